@@ -1,34 +1,29 @@
 from __future__ import annotations
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import perf_counter, time
+import json
+import os
 import tkinter as tk
 import ss_classes as ss
-from ss_export import load_defaults, render_fusion_output
-from PIL import ImageTk
-import pyperclip
+from ss_export import (
+    COMPACT_DECIMALS,
+    load_defaults,
+    nodes_per_screen,
+    render_fusion_delta,
+)
+from ss_cache import RenderCache
+from ss_history import Changes, History
+from ss_journal import Journal, layout_to_spec, restore
+
+EXPORT_POLL_MS = 100  # status bar updates while an export runs
+# the working layout is journaled here and restored on the next start.
+# SS_AUTOSAVE_DIRECTORY overrides it, e.g. for the startup benchmark
+AUTOSAVE_DIRECTORY = os.environ.get("SS_AUTOSAVE_DIRECTORY") or os.path.join(
+    os.path.expanduser("~"), ".splitscreener", "autosave"
+)
 
 
 # FUNCTIONS ======================================================
-def is_within(coords: tuple[float, float], area: dict[tuple[float, float]]) -> bool:
-    x, y = coords[0], coords[1]
-    if x <= area["top_left"][0]:
-        return False
-    if x >= area["top_right"][0]:
-        return False
-    if y >= area["top_left"][1]:
-        return False
-    if y <= area["bottom_left"][1]:
-        return False
-    return True
-
-
-def find_grid_block_within(
-    coords: tuple[float, float], grid_blocks: list[GridBlock]
-) -> GridBlock:
-    return next(
-        (block for block in grid_blocks if is_within(coords, block.grid_cell.corners)),
-        None,
-    )
-
-
 def get_event_coords_normalized(event) -> tuple[float, float]:
     self = event.widget
     coords = (event.x / self.winfo_width(), 1 - event.y / self.winfo_height())
@@ -36,14 +31,17 @@ def get_event_coords_normalized(event) -> tuple[float, float]:
 
 
 def clear_status_bar(cls: ScreenSplitter) -> None:
-    cls.after(3500, lambda: cls.status_text.set(""))
+    # only the latest message's timer clears it, so progress updates stay up
+    if cls.status_clear is not None:
+        cls.after_cancel(cls.status_clear)
+    cls.status_clear = cls.after(3500, lambda: cls.status_text.set(""))
 
 
-def btn_on_hover(event: tk.Event, image: ImageTk.PhotoImage = None):
+def btn_on_hover(event: tk.Event, image: tk.PhotoImage = None):
     event.widget.configure(image=image)
 
 
-def set_hover_style(button: tk.Label, img_list: list[ImageTk.PhotoImage]):
+def set_hover_style(button: tk.Label, img_list: IconStates):
     button.bind("<Enter>", lambda e: btn_on_hover(event=e, image=img_list[1]))
     button.bind("<Leave>", lambda e: btn_on_hover(event=e, image=img_list[0]))
     button.bind("<Button-1>", lambda e: btn_on_hover(event=e, image=img_list[2]))
@@ -56,7 +54,7 @@ def set_hover_style(button: tk.Label, img_list: list[ImageTk.PhotoImage]):
 
 ###################         BLOCKS            ##########################
 class ScreenBlock:
-    screen_blocks: list[ScreenBlock] = None
+    screen_blocks: dict[ss.Screen, ScreenBlock] = None
     settings: dict[str, int | str] = None
 
     def __init__(
@@ -67,9 +65,9 @@ class ScreenBlock:
 
         self.compute()
         if ScreenBlock.screen_blocks is None:
-            ScreenBlock.grid_blocks = []
+            ScreenBlock.screen_blocks = {}
 
-        ScreenBlock.grid_blocks.append(self)
+        ScreenBlock.screen_blocks[ss_screen] = self
 
         if ScreenBlock.settings is None:
             ScreenBlock.settings = {}
@@ -81,10 +79,16 @@ class ScreenBlock:
             self.x0, self.y0, self.x1, self.y1, **self.settings
         )
 
-    def compute(self):
-        self.canvas.update()
-        canvas_height = self.canvas.winfo_height()
-        canvas_width = self.canvas.winfo_width()
+    def move(self) -> None:
+        self.canvas.coords(self.rect, self.x0, self.y0, self.x1, self.y1)
+
+    def undraw(self) -> None:
+        self.canvas.delete(self.rect)
+        ScreenBlock.screen_blocks.pop(self.screen, None)
+
+    def compute(self, viewport: tuple[int, int] = None):
+        """Computes pixel coords. Pass the frame's viewport when computing many blocks."""
+        canvas_width, canvas_height = viewport or self.canvas.viewport
         screen = self.screen
         y = 1 - screen.y
 
@@ -95,10 +99,10 @@ class ScreenBlock:
 
     @classmethod
     def draw_all(cls):
-        for block in cls.screen_blocks:
-            block.compute()
+        for block in cls.screen_blocks.values():
+            block.compute(block.canvas.viewport)
 
-        for block in cls.screen_blocks:
+        for block in cls.screen_blocks.values():
             block.draw()
 
 
@@ -120,10 +124,9 @@ class GridBlock:
             GridBlock.grid_blocks = []
         GridBlock.grid_blocks.append(self)
 
-    def compute(self):
-        self.canvas.update()
-        canvas_height = self.canvas.winfo_height()
-        canvas_width = self.canvas.winfo_width()
+    def compute(self, viewport: tuple[int, int] = None):
+        """Computes pixel coords. Pass the frame's viewport when computing many blocks."""
+        canvas_width, canvas_height = viewport or self.canvas.viewport
         cell = self.grid_cell
         y = 1 - cell.y
 
@@ -137,6 +140,9 @@ class GridBlock:
             self.x0, self.y0, self.x1, self.y1, **self.settings
         )
 
+    def move(self):
+        self.canvas.coords(self.rect, self.x0, self.y0, self.x1, self.y1)
+
     def undraw(self, *opt):
         self.canvas.delete(self.rect)
         GridBlock.grid_blocks.remove(self)
@@ -153,23 +159,37 @@ class GridBlock:
     @classmethod
     def draw_all(cls):
         for block in cls.grid_blocks:
-            block.compute()
+            block.compute(block.canvas.viewport)
 
         for block in cls.grid_blocks:
             block.draw()
 
     @classmethod
-    def create_all(cls, canvas: tk.Canvas, grid: ss.Grid, **config):
+    def sync_all(cls, canvas: tk.Canvas, grid: ss.Grid, **config):
+        """Keeps one drawn block per grid cell. Existing rectangles are moved, they are
+        only created or deleted when the amount of cells changes."""
         if cls.grid_blocks is None:
             cls.grid_blocks = []
-        cls.grid_blocks.clear()
+        blocks = cls.grid_blocks
+
+        # pooled grid cells from provided grid
+        cells = cls.blocks_from_grid(grid)
+        viewport = canvas.viewport
 
-        # creates grid cells from provided grid
-        grid_block_screens = cls.blocks_from_grid(grid)
+        for block in blocks[len(cells) :]:
+            canvas.delete(block.rect)
+        del blocks[len(cells) :]
 
-        # initializes grid block from generated cells
-        for cell in grid_block_screens:
-            GridBlock(canvas, cell, **config)
+        for block, cell in zip(blocks, cells):
+            block.grid_cell = cell
+            block.compute(viewport)
+            block.move()
+
+        # new blocks go below the screens
+        for cell in cells[len(blocks) :]:
+            block = GridBlock(canvas, cell, **config)
+            block.draw()
+            canvas.tag_lower(block.rect)
 
     def bind(self, event: str, function) -> None:
         self.canvas.tag_bind(self.tag, sequence=event, func=function)
@@ -199,23 +219,14 @@ class ScreenSplitter(tk.Canvas):
 
     @classmethod
     def on_click(cls, event: tk.Event) -> None:
-        self = event.widget
-
-        item = self.find_closest(event.x, event.y)
-        if self.itemcget(item, "fill") == cls.screen_color:
+        coords = get_event_coords_normalized(event)
+        if cls.ss_grid.screen_at(*coords) is not None:
             print("clicked on screen")
             cls.new_screen_coords = None
             return
 
-        coords = get_event_coords_normalized(event)
         cls.new_screen_coords = coords
-        block = find_grid_block_within(coords, GridBlock.grid_blocks)
-
-        if block is not None:
-            index = block.grid_cell.index
-            cls.new_screen_indexes = index
-            return
-        cls.new_screen_indexes = None
+        cls.new_screen_indexes = cls.ss_grid.cell_at(*coords)
 
     @classmethod
     def on_release(cls, event: tk.Event) -> None:
@@ -224,10 +235,9 @@ class ScreenSplitter(tk.Canvas):
             return
         coords = get_event_coords_normalized(event)
         cls.new_screen_coords = (cls.new_screen_coords, coords)
-        block = find_grid_block_within(coords, GridBlock.grid_blocks)
+        index = cls.ss_grid.cell_at(*coords)
 
-        if block is not None:
-            index = block.grid_cell.index
+        if index is not None and cls.new_screen_indexes is not None:
             cls.new_screen_indexes = (cls.new_screen_indexes, index)
             event.widget.create_screen()
             return
@@ -243,8 +253,18 @@ class ScreenSplitter(tk.Canvas):
             ScreenSplitter.ss_grid, *ScreenSplitter.new_screen_indexes
         )
         self.draw_screen(new_screen)
+        self.commit_history()
+        if self.status_text is not None and self.ss_grid.occupancy.overlaps(new_screen):
+            self.status_text.set("New screen overlaps another one.")
 
     def draw_screen(self, screen: ss.Screen) -> None:
+        """Draws a new screen, or moves its rectangle if it's already drawn."""
+        if ScreenBlock.screen_blocks and screen in ScreenBlock.screen_blocks:
+            screen_block = ScreenBlock.screen_blocks[screen]
+            screen_block.compute(self.viewport)
+            screen_block.move()
+            return
+
         new_screen_block = ScreenBlock(
             self,
             screen,
@@ -281,19 +301,23 @@ class ScreenSplitter(tk.Canvas):
 
         canvas: tk.Canvas = event.widget
         screen_rect_id = canvas.find_closest(event.x, event.y)[0]
-        self.delete(screen_rect_id)
 
         to_delete = [
             screen for screen in self.ss_grid.screens if screen.id == screen_rect_id
         ]
-        self.ss_grid.screens.remove(*to_delete)
+        for screen in to_delete:
+            ScreenBlock.screen_blocks[screen].undraw()
+            screen.delete()
+        self.commit_history()
         self.user_wants_to_delete = True
 
     # SCREEN BATCH DELETION =================================
     def delete_all_screens(self, event):
         if not self.delete_screen_rectangles():
             return
-        self.ss_grid.screens.clear()
+        for screen in self.ss_grid.screens.copy():
+            screen.delete()
+        self.commit_history()
 
     def pre_delete_all_screens(self, event):
         if self.ss_grid.screens is None:
@@ -399,17 +423,20 @@ class ScreenSplitter(tk.Canvas):
         if not self.ss_grid.flip_horizontally():
             return
         self.screens_only_refresh()
+        self.commit_history()
 
     def flip_v(self, event):
         if not self.ss_grid.flip_vertically():
             return
         self.screens_only_refresh()
+        self.commit_history()
 
     def rotate_cw(self, event):
-        self.ss_grid.rotate_clockwise()
-        if self.ss_grid.screens is not None:
-            for screen in self.ss_grid.screens:
-                screen.rotate_clockwise()
+        with self.ss_grid.batch():
+            self.ss_grid.rotate_clockwise()
+            if self.ss_grid.screens is not None:
+                for screen in self.ss_grid.screens:
+                    screen.rotate_clockwise()
 
         self.global_refresh()
         self.update_all_vars()
@@ -433,14 +460,9 @@ class ScreenSplitter(tk.Canvas):
 
         self.update_dims()
 
-        GridBlock.create_all(self, self.ss_grid)
-
-        self.delete("all")
-        GridBlock.draw_all()
-        if self.ss_grid.screens is None:
-            return
-        for screen in self.ss_grid.screens:
-            self.draw_screen(screen)
+        GridBlock.sync_all(self, self.ss_grid)
+        self.screens_only_refresh()
+        self.commit_history()
 
     # canvas
     def width_refresh(self, func: function):
@@ -543,10 +565,10 @@ class ScreenSplitter(tk.Canvas):
 
     # screens
     def screens_only_refresh(self):
-        if not self.delete_screen_rectangles():
+        if self.ss_grid.screens is None:
             return
 
-        # redraw everything
+        # moves existing rectangles, bindings stay in place
         for screen in self.ss_grid.screens:
             self.draw_screen(screen)
 
@@ -555,12 +577,68 @@ class ScreenSplitter(tk.Canvas):
             return False
 
         # delete actual rectangles
-        ids_to_delete = [screen.id for screen in self.ss_grid.screens]
-        for id in ids_to_delete:
-            self.delete(id)
+        for screen in self.ss_grid.screens:
+            ScreenBlock.screen_blocks[screen].undraw()
 
         return True
 
+    # HISTORY             ==========================================
+    history: History = None
+    journal: Journal = None  # autosave
+
+    @classmethod
+    def commit_history(cls) -> None:
+        """Records the user's last edit as an undo step and journals it. Refreshes
+        that changed nothing, and undo and redo, don't make a step."""
+        if cls.history is None:
+            return
+        committed = cls.history.commit()
+        journal = cls.journal
+        if journal is None or (not committed and journal.last is cls.history.current):
+            return
+        try:
+            journal.record(cls.history.current)
+        except Exception as error:  # raised by the writer thread, e.g. a full disk
+            print(f"Autosave stopped ({error!r}), edits are no longer saved.")
+            cls.journal = None
+
+    def undo(self, event: tk.Event = None) -> None:
+        self.redraw_changes(self.history.undo())
+        self.commit_history()
+
+    def redo(self, event: tk.Event = None) -> None:
+        self.redraw_changes(self.history.redo())
+        self.commit_history()
+
+    def redraw_changes(self, changes: Changes | None) -> None:
+        """Redraws what an undo or redo touched. Only canvas, margin or grid changes
+        move every rectangle."""
+        if changes is None:
+            return
+        for screen in changes.removed:
+            ScreenBlock.screen_blocks[screen].undraw()
+        if changes.layout:
+            self.global_refresh()
+            self.update_all_vars()
+        else:
+            for screen in changes.added + changes.edited:
+                self.draw_screen(screen)
+        self.restack(changes.added)
+
+    def restack(self, screens: list[ss.Screen]) -> None:
+        """New rectangles are drawn on top. Moves the ones of screens back to their
+        place in merge order, right under the screen merged after them."""
+        if not screens:
+            return
+        order = self.ss_grid.screens
+        index = {screen: i for i, screen in enumerate(order)}
+        blocks = ScreenBlock.screen_blocks
+        # from the top down, so the screen above is always in place already
+        for screen in sorted(screens, key=index.__getitem__, reverse=True):
+            above = index[screen] + 1
+            if above < len(order):
+                self.tag_lower(blocks[screen].rect, blocks[order[above]].rect)
+
     # CANVAS DISPLAY METHODS ==========================================
     max_width = 750
     max_height = 550
@@ -568,6 +646,9 @@ class ScreenSplitter(tk.Canvas):
     scale_var: tk.DoubleVar() = None
     scale_text: tk.StringVar() = None
 
+    # canvas size in pixels, snapshotted once per frame by update_dims
+    viewport: tuple[int, int] = None
+
     def compute_dims(self) -> tuple[int]:
         canvas = self.ss_grid.canvas
         aspect_ratio = canvas.aspect_ratio
@@ -588,6 +669,9 @@ class ScreenSplitter(tk.Canvas):
         canvas_width, canvas_height = self.compute_dims()
         self.config(width=canvas_width, height=canvas_height)
 
+        # no border or highlight, so this is what winfo_width/height would report
+        self.viewport = round(canvas_width), round(canvas_height)
+
         self.preview_scale = canvas_width / self.ss_grid.canvas.width
 
         self.scale_var.set(value=self.preview_scale)
@@ -595,8 +679,27 @@ class ScreenSplitter(tk.Canvas):
 
     # IO METHODS            ==========================================
     fusion_export: str = None  # for saving
+    render_cache = RenderCache()  # pressing Render twice doesn't rebuild the tree
     status_text = None  # for announcing
+    status_clear: str = None  # after() id of the pending status bar clear
     fusion_studio: tk.BooleanVar = None
+    merge_tree: tk.BooleanVar = None  # balanced merge tree instead of a chain
+    crop_screens: tk.BooleanVar = None  # Crops instead of full canvas masks
+    cull_hidden: tk.BooleanVar = None  # leave out screens hidden under later ones
+    compact_output: tk.BooleanVar = None  # rounded values, no whitespace
+
+    # DELTA EXPORTS: (resolution, fusion_studio, topology, compositing, compact,
+    # screen values) of the last export
+    delta_export: tk.BooleanVar = None
+    last_export: tuple = None
+
+    # BACKGROUND EXPORTS: one worker thread. Every click bumps export_generation,
+    # a job that's been superseded by the time it's rendered leaves the clipboard alone
+    export_executor: ThreadPoolExecutor = None
+    export_job: Future = None
+    export_generation: int = 0
+    export_stage: str = ""  # what the export thread is doing, for the status bar
+    export_started: float = 0.0
 
     @classmethod
     def export_for_fusion(cls, event: tk.Event) -> None:
@@ -605,13 +708,136 @@ class ScreenSplitter(tk.Canvas):
         screen_values = []
         for screen in cls.ss_grid.screens:
             screen_values.append(screen.get_values())
-        cls.fusion_export = render_fusion_output(
-            screen_values, cls.ss_grid.canvas.resolution, cls.fusion_studio.get()
-        )
-        pyperclip.copy(cls.fusion_export)
+        resolution = cls.ss_grid.canvas.resolution
+        fusion_studio = cls.fusion_studio.get()
+        merge_tree = cls.merge_tree is not None and cls.merge_tree.get()
+        topology = "tree" if merge_tree else "chain"
+        crop_screens = cls.crop_screens is not None and cls.crop_screens.get()
+        compositing = "crop" if crop_screens else "mask"
+        compact = None
+        if cls.compact_output is not None and cls.compact_output.get():
+            compact = COMPACT_DECIMALS
+
         if cls.status_text is None:
             cls.status_text = tk.StringVar()
-        cls.status_text.set("Node tree successfuly copied to clipboard.")
+
+        # hidden screens become None, so the others keep their MediaIn layer.
+        # Duplicates never show, only the last screen of each run is exported
+        culled = ""
+        if cls.cull_hidden is not None and cls.cull_hidden.get():
+            visible, duplicates = cls.ss_grid.occlusion()
+            hidden = visible.count(False)
+            message = f" Skipped {hidden} hidden screens ({duplicates} duplicates)"
+        else:
+            visible = [not duplicate for duplicate in cls.ss_grid.duplicates()]
+            hidden = visible.count(False)
+            message = f" Merged {hidden} duplicate screens"
+        if hidden:
+            screen_values = [
+                values if shows else None
+                for values, shows in zip(screen_values, visible)
+            ]
+            saved = hidden * nodes_per_screen(fusion_studio, topology)
+            culled = f"{message}, {saved} nodes saved."
+
+        # compute replaces screen values instead of updating them, so the
+        # snapshot can keep them as they are
+        snapshot = (
+            resolution,
+            fusion_studio,
+            topology,
+            compositing,
+            compact,
+            screen_values,
+        )
+        last = cls.last_export
+        can_delta = (
+            cls.delta_export is not None
+            and cls.delta_export.get()
+            and last is not None
+            and last[:5] == snapshot[:5]
+            and len(last[5]) == len(screen_values)
+            and all((a is None) == (b is None) for a, b in zip(last[5], screen_values))
+        )
+
+        # the render and the clipboard copy (xclip or xsel on Linux) run on the
+        # export thread; a click during an export supersedes it
+        cls.export_generation += 1
+        if cls.export_job is not None:
+            cls.export_job.cancel()  # only works while it hasn't started
+        if cls.export_executor is None:
+            cls.export_executor = ThreadPoolExecutor(max_workers=1)
+        cls.export_stage = f"Rendering {len(screen_values)} screens"
+        cls.export_started = perf_counter()
+        cls.export_job = cls.export_executor.submit(
+            cls.render_export,
+            cls.export_generation,
+            snapshot,
+            last[5] if can_delta else None,
+        )
+        cls.poll_export(event.widget, cls.export_job, snapshot, culled)
+
+    @classmethod
+    def render_export(
+        cls, generation: int, snapshot: tuple, delta_from: list[dict] = None
+    ) -> tuple[str, str] | None:
+        """Runs on the export thread. Renders the snapshot, or its delta against
+        delta_from, and copies it unless a newer export was requested meanwhile.
+        Returns the status message and what was copied, None if superseded."""
+
+        resolution, fusion_studio, topology, compositing, compact, values = snapshot
+        if delta_from is not None:
+            export = render_fusion_delta(
+                delta_from, values, resolution, compositing, compact
+            )
+            if export is None:
+                return "Nothing changed since the last export.", None
+            message = "Changed inputs successfuly copied to clipboard."
+        else:
+            export = cls.render_cache.render(
+                values,
+                resolution,
+                fusion_studio,
+                topology=topology,
+                compositing=compositing,
+                compact=compact,
+            )
+            message = "Node tree successfuly copied to clipboard."
+
+        if generation != cls.export_generation:
+            return None
+        cls.export_stage = "Copying to clipboard"
+        import pyperclip
+
+        pyperclip.copy(export)
+        return message, export
+
+    @classmethod
+    def poll_export(
+        cls, widget: tk.Widget, job: Future, snapshot: tuple, culled: str
+    ) -> None:
+        """Shows the export's progress until it's done, then its outcome. Runs on
+        the Tk thread, rescheduling itself with after()."""
+
+        if job is not cls.export_job:
+            return  # superseded, the newer export reports instead
+        if not job.done():
+            elapsed = perf_counter() - cls.export_started
+            cls.status_text.set(f"{cls.export_stage}... {elapsed:.1f}s")
+            widget.after(EXPORT_POLL_MS, cls.poll_export, widget, job, snapshot, culled)
+            return
+
+        cls.export_job = None
+        error = job.exception()
+        if error is not None:
+            print(f"Export failed: {error!r}")
+            cls.status_text.set(f"Export failed: {error}")
+            return
+        message, export = job.result()
+        if export is not None:
+            cls.fusion_export = export
+            cls.last_export = snapshot
+        cls.status_text.set(message + culled)
 
     def save_splitscreener_preset():
         ...
@@ -619,8 +845,43 @@ class ScreenSplitter(tk.Canvas):
     def save_fusion_preset():
         ...
 
-    def reset_defaults():
-        ...
+    def reset_defaults(self, event: tk.Event = None) -> None:
+        self.load_layout(load_defaults("defaults.json"))
+
+    def load_splitscreener_preset(self, preset_file: str | os.PathLike) -> None:
+        with open(preset_file, "r") as _:
+            self.load_layout(json.load(_))
+
+    def load_layout(self, spec: dict) -> None:
+        """Applies a layout spec (defaults.json, a SplitScreener preset) in one batch.
+        Screens are only replaced if the spec has some."""
+        grid = self.ss_grid
+        canvas, margin, layout = spec["canvas"], spec["margin"], spec["grid"]
+        replace_screens = "screens" in spec
+        if replace_screens:
+            self.delete_screen_rectangles()
+
+        with grid.batch():
+            grid.canvas.resolution = canvas["width"], canvas["height"]
+            grid.margin.tlbr = tuple(
+                margin[side] for side in ("top", "left", "bottom", "right")
+            )
+            grid.margin.gutter = margin["gutter"]
+            grid.composition = layout["cols"], layout["rows"]
+            if replace_screens:
+                for screen in (grid.screens or []).copy():
+                    screen.delete()
+                for screen in spec["screens"]:
+                    ss.Screen(
+                        grid,
+                        screen["colspan"],
+                        screen["rowspan"],
+                        screen["col"],
+                        screen["row"],
+                    )
+
+        self.global_refresh()
+        self.update_all_vars()
 
     def save_new_defaults():
         ...
@@ -632,6 +893,22 @@ class RectTracker:
         self.canvas = canvas
         self.item = None
 
+        # motion events are coalesced: only the latest one is drawn, once per idle
+        self.end: tuple[int, int] = None
+        self.redraw_scheduled = None
+
+        # latency counters, for the last drag
+        self.motion_events = 0
+        self.redraws = 0
+        self.redraw_time = 0.0
+
+    @property
+    def latency(self) -> float:
+        """Average time spent per redraw in the last drag, in ms."""
+        if not self.redraws:
+            return 0.0
+        return self.redraw_time / self.redraws * 1000
+
     def draw(self, start: list[int, int], end: list[int, int], **opts):
         """Draw the rectangle"""
         return self.canvas.create_rectangle(*(list(start) + list(end)), **opts)
@@ -648,17 +925,39 @@ class RectTracker:
     def __update(self, event: tk.Event):
         if not self.start:
             self.start = [event.x, event.y]
+            self.motion_events = self.redraws = 0
+            self.redraw_time = 0.0
             return
 
-        if self.item is not None:
-            self.canvas.delete(self.item)
-        self.item = self.draw(self.start, (event.x, event.y), **self.rectopts)
+        self.motion_events += 1
+        self.end = (event.x, event.y)
+        if self.redraw_scheduled is None:
+            self.redraw_scheduled = self.canvas.after_idle(self.__redraw)
+
+    def __redraw(self):
+        self.redraw_scheduled = None
+        if not self.start or self.end is None:
+            return
+
+        started = perf_counter()
+        if self.item is None:
+            self.item = self.draw(self.start, self.end, **self.rectopts)
+        else:
+            self.canvas.coords(self.item, *self.start, *self.end)
+            self.canvas.itemconfig(self.item, state=tk.NORMAL)
+            self.canvas.tag_raise(self.item)
+        self.redraws += 1
+        self.redraw_time += perf_counter() - started
         # self._command(self.start, (event.x, event.y))
 
     def __stop(self, event: tk.Event):
+        if self.redraw_scheduled is not None:
+            self.canvas.after_cancel(self.redraw_scheduled)
+            self.redraw_scheduled = None
         self.start = None
-        self.canvas.delete(self.item)
-        self.item = None
+        self.end = None
+        if self.item is not None:
+            self.canvas.itemconfig(self.item, state=tk.HIDDEN)
 
 
 ###################         STYLE PALETTES          ####################
@@ -723,6 +1022,57 @@ class ImgPalette:
 
     icn_link = ["icn_link_state1.png", "icn_link_state2.png", "icn_link_state3.png"]
 
+    # all of the above, packed by ss_atlas.py
+    atlas = "icons_atlas.png"
+    atlas_hover = "icons_atlas_hover.png"
+    atlas_manifest = "icons_atlas.json"
+
+
+class SpriteAtlas:
+    """Images packed into one PNG by ss_atlas.py, decoded on first use and sliced into
+    PhotoImages by their source file name."""
+
+    manifest: dict[str, dict[str, list[int]]] = None
+
+    def __init__(self, atlas_file: str) -> None:
+        self.atlas_file = atlas_file
+        self._atlas: tk.PhotoImage = None
+        self._sprites: dict[str, tk.PhotoImage] = {}  # Tk drops images nobody holds
+
+    @classmethod
+    def load_manifest(cls, manifest_file: str) -> None:
+        with open(manifest_file, "r") as _:
+            cls.manifest = json.load(_)
+
+    def get(self, name: str) -> tk.PhotoImage:
+        sprite = self._sprites.get(name)
+        if sprite is not None:
+            return sprite
+
+        if self._atlas is None:
+            self._atlas = tk.PhotoImage(file=self.atlas_file)
+        x, y, width, height = SpriteAtlas.manifest[self.atlas_file][name]
+        sprite = tk.PhotoImage(width=width, height=height)
+        sprite.tk.call(
+            sprite, "copy", self._atlas, "-from", x, y, x + width, y + height
+        )
+        self._sprites[name] = sprite
+        return sprite
+
+
+class IconStates:
+    """Normal, hover and pressed images of an icon, as set_hover_style indexes them.
+    Hover and pressed live in their own atlas, decoded the first time one is shown."""
+
+    def __init__(self, files: list[str], atlas: SpriteAtlas, hover_atlas: SpriteAtlas):
+        self.files = files
+        self.atlas = atlas
+        self.hover_atlas = hover_atlas
+
+    def __getitem__(self, state: int) -> tk.PhotoImage:
+        atlas = self.atlas if state == 0 else self.hover_atlas
+        return atlas.get(self.files[state])
+
 
 class Defaults:
     def __init__(self):
@@ -752,6 +1102,17 @@ def main():
     df = Defaults()
     defaults = df.values
 
+    # RESTORING THE LAST SESSION =============================================
+    try:
+        restored, seq = restore(AUTOSAVE_DIRECTORY)
+    except (KeyError, TypeError, ValueError, ArithmeticError) as error:
+        print(f"Couldn't restore the last session ({error!r}), starting from defaults.")
+        restored, seq = None, 0
+    if restored is not None:
+        spec = layout_to_spec(restored)
+        for section in ("canvas", "margin", "grid"):
+            defaults.update(spec[section])
+
     # SPLITSCREENER INITIALIZERS ======================================
     ss_canvas = ss.Canvas((defaults["width"], defaults["height"]))
     ss_margin = ss.Margin(
@@ -760,6 +1121,9 @@ def main():
         gutter=defaults["gutter"],
     )
     ss_grid = ss.Grid(ss_canvas, ss_margin, (defaults["cols"], defaults["rows"]))
+    if restored is not None:
+        for record in restored.screens:
+            ss.Screen(ss_grid, *record[1:])
 
     ##################################################################################
     #####################       ROOT & SETUP      ####################################
@@ -769,6 +1133,10 @@ def main():
     fp = FontPalette()
     ip = ImgPalette()
 
+    SpriteAtlas.load_manifest(ip.atlas_manifest)
+    sprites = SpriteAtlas(ip.atlas)
+    hover_sprites = SpriteAtlas(ip.atlas_hover)
+
     # root.iconbitmap(ip.app_icon)
 
     # ROOT CONFIGS =========================================================
@@ -816,7 +1184,7 @@ def main():
     ##################################################################################
 
     # APP LOGO
-    logo = ImageTk.PhotoImage(file=ip.app_logo)
+    logo = sprites.get(ip.app_logo)
 
     # APP TITLE
     app_title = tk.Label(header, height=100, justify=tk.CENTER, image=logo)
@@ -848,6 +1216,27 @@ def main():
     screen_splitter.bind("<Button-1>", screen_splitter.on_click)
     screen_splitter.bind("<ButtonRelease-1>", screen_splitter.on_release)
 
+    # UNDO, REDO AND AUTOSAVE =======================================
+    ScreenSplitter.history = History(ss_grid)
+    ScreenSplitter.journal = Journal(AUTOSAVE_DIRECTORY, seq)
+    ScreenSplitter.journal.start(ScreenSplitter.history.current)
+
+    def close() -> None:
+        if ScreenSplitter.journal is not None:
+            try:
+                ScreenSplitter.journal.close()
+            except Exception as error:
+                print(f"Couldn't autosave the last edits ({error!r}).")
+        root.destroy()
+
+    root.protocol("WM_DELETE_WINDOW", close)
+
+    aqua = root.tk.call("tk", "windowingsystem") == "aqua"
+    modifier = "Command" if aqua else "Control"
+    root.bind(f"<{modifier}-z>", screen_splitter.undo)
+    root.bind(f"<{modifier}-Shift-Z>", screen_splitter.redo)
+    root.bind(f"<{modifier}-y>", screen_splitter.redo)
+
     # SCALE LABEL ====================================================================
     scale_label = tk.Label(
         creator_frame,
@@ -863,7 +1252,7 @@ def main():
     scale_label.grid(row=3, sticky=tk.NE)
 
     # RENDERING GRID BLOCKS ======================================================
-    GridBlock.create_all(
+    GridBlock.sync_all(
         screen_splitter,
         ss_grid,
         fill=cp.CANVAS_BLOCK,
@@ -872,7 +1261,7 @@ def main():
         activeoutline=cp.CANVAS_BLOCK,
         activewidth=1,
     )
-    GridBlock.draw_all()
+    screen_splitter.screens_only_refresh()  # restored screens
 
     # SELECTION RECTANGLE ==============================================
     rect = RectTracker(screen_splitter)
@@ -910,19 +1299,19 @@ def main():
 
     # LINK MARGINS ======================================================================
     # top bracket
-    lbracket_top_image = ImageTk.PhotoImage(file=ip.icn_lbracket_top)
+    lbracket_top_image = sprites.get(ip.icn_lbracket_top)
     lbracket_top = tk.Label(button_frame_left, image=lbracket_top_image)
     lbracket_top.grid(column=2, row=4, rowspan=2, sticky=tk.E, padx=11)
 
     # link button
-    link_margins_image = [ImageTk.PhotoImage(file=ip.icn_link[x]) for x in range(3)]
+    link_margins_image = IconStates(ip.icn_link, sprites, hover_sprites)
     link_margins = tk.Label(button_frame_left, image=link_margins_image[0])
     link_margins.grid(column=2, row=5, rowspan=2, sticky=tk.W, padx=9)
     set_hover_style(link_margins, link_margins_image)
     link_margins.bind("<Button-1>", screen_splitter.link_margins, add="+")
 
     # bottom bracket
-    lbracket_btm_image = ImageTk.PhotoImage(file=ip.icn_lbracket_bottom)
+    lbracket_btm_image = sprites.get(ip.icn_lbracket_bottom)
     lbracket_btm = tk.Label(button_frame_left, image=lbracket_btm_image)
     lbracket_btm.grid(column=2, row=6, rowspan=2, sticky=tk.E, padx=11)
 
@@ -1087,7 +1476,7 @@ def main():
     button_frame_right.option_add("*font", fp.small)
 
     # Rotate Clockwise
-    rotate_cw_img = [ImageTk.PhotoImage(file=ip.icn_rotate_cw[x]) for x in range(3)]
+    rotate_cw_img = IconStates(ip.icn_rotate_cw, sprites, hover_sprites)
     rotate_cw_icon = tk.Label(button_frame_right, image=rotate_cw_img[0])
     rotate_cw_text = tk.Label(
         button_frame_right, text="Rotate Clockwise", justify=tk.LEFT
@@ -1099,7 +1488,7 @@ def main():
     rotate_cw_text.grid(column=2, row=1, padx=10, sticky=tk.W)
 
     # Rotate Counterclockwise
-    rotate_ccw_img = [ImageTk.PhotoImage(file=ip.icn_rotate_ccw[x]) for x in range(3)]
+    rotate_ccw_img = IconStates(ip.icn_rotate_ccw, sprites, hover_sprites)
     rotate_ccw_icon = tk.Label(button_frame_right, image=rotate_ccw_img[0])
     rotate_ccw_text = tk.Label(
         button_frame_right, text="Rotate\nCounterclockwise", justify=tk.LEFT
@@ -1111,7 +1500,7 @@ def main():
     rotate_ccw_text.grid(column=2, row=2, padx=10, sticky=tk.W)
 
     # Flip Vertically
-    flipv_img = [ImageTk.PhotoImage(file=ip.icn_flip_v[x]) for x in range(3)]
+    flipv_img = IconStates(ip.icn_flip_v, sprites, hover_sprites)
     flipv_icon = tk.Label(button_frame_right, image=flipv_img[0])
     flipv_text = tk.Label(button_frame_right, text="Flip Vertically", justify=tk.LEFT)
 
@@ -1123,7 +1512,7 @@ def main():
     flipv_text.grid(column=2, row=3, padx=10, sticky=tk.W)
 
     # Flip Horizontally
-    fliph_img = [ImageTk.PhotoImage(file=ip.icn_flip_h[x]) for x in range(3)]
+    fliph_img = IconStates(ip.icn_flip_h, sprites, hover_sprites)
     fliph_icon = tk.Label(button_frame_right, image=fliph_img[0])
     fliph_text = tk.Label(button_frame_right, text="Flip Horizontally", justify=tk.LEFT)
 
@@ -1135,7 +1524,7 @@ def main():
     fliph_text.grid(column=2, row=4, padx=10, sticky=tk.W)
 
     # Delete all screens
-    delete_img = [ImageTk.PhotoImage(file=ip.icn_delete_all[x]) for x in range(3)]
+    delete_img = IconStates(ip.icn_delete_all, sprites, hover_sprites)
 
     delete_icon = tk.Label(button_frame_right, image=delete_img[0])
     delete_text = tk.Label(
@@ -1156,7 +1545,7 @@ def main():
     ##################### RENDER BUTTON AND FOOTER ###################################
     ##################################################################################
 
-    render_bttn_img = ImageTk.PhotoImage(file=ip.btn_render)
+    render_bttn_img = sprites.get(ip.btn_render)
 
     render_button = tk.Button(
         render_bttn_frame,
@@ -1174,6 +1563,56 @@ def main():
     render_button.bind("<Button-1>", screen_splitter.export_for_fusion)
     render_button.grid(column=1, row=1, sticky=tk.N, pady=20)
 
+    # only copy the inputs that changed since the last render
+    ScreenSplitter.delta_export = tk.BooleanVar()
+    delta_export_check = tk.Checkbutton(
+        render_bttn_frame,
+        text="Only copy changes",
+        variable=ScreenSplitter.delta_export,
+        foreground=cp.TEXT_DARKER,
+    )
+    delta_export_check.grid(column=1, row=2)
+
+    # shallower node tree for big walls
+    ScreenSplitter.merge_tree = tk.BooleanVar()
+    merge_tree_check = tk.Checkbutton(
+        render_bttn_frame,
+        text="Balanced merge tree",
+        variable=ScreenSplitter.merge_tree,
+        foreground=cp.TEXT_DARKER,
+    )
+    merge_tree_check.grid(column=1, row=3)
+
+    # cheaper to render than a full canvas mask per screen
+    ScreenSplitter.crop_screens = tk.BooleanVar()
+    crop_screens_check = tk.Checkbutton(
+        render_bttn_frame,
+        text="Crop screens instead of masking",
+        variable=ScreenSplitter.crop_screens,
+        foreground=cp.TEXT_DARKER,
+    )
+    crop_screens_check.grid(column=1, row=4)
+
+    # screens fully covered by later ones don't make it into the node tree
+    ScreenSplitter.cull_hidden = tk.BooleanVar()
+    cull_hidden_check = tk.Checkbutton(
+        render_bttn_frame,
+        text="Skip hidden screens",
+        variable=ScreenSplitter.cull_hidden,
+        foreground=cp.TEXT_DARKER,
+    )
+    cull_hidden_check.grid(column=1, row=5)
+
+    # smaller clipboard payload for big walls
+    ScreenSplitter.compact_output = tk.BooleanVar()
+    compact_output_check = tk.Checkbutton(
+        render_bttn_frame,
+        text="Compact output",
+        variable=ScreenSplitter.compact_output,
+        foreground=cp.TEXT_DARKER,
+    )
+    compact_output_check.grid(column=1, row=6)
+
     # FOOTER FRAME ================================================
     ScreenSplitter.status_text = tk.StringVar()
     ScreenSplitter.status_text.trace_add(
@@ -1189,6 +1628,17 @@ def main():
     status_bar.pack(pady=15)
     tk.Frame(footer, height=15).pack()
 
+    # for the startup benchmark: report when the first frame is drawn, then quit
+    # the way closing the window does
+    if os.environ.get("SS_STARTUP_PROBE"):
+
+        def first_paint() -> None:
+            root.update()
+            print(f"first paint {time()}", flush=True)
+            close()
+
+        root.after_idle(first_paint)
+
     root.mainloop()
 
 
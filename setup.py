@@ -42,6 +42,10 @@ DATA_FILES = [
     "icn_link_state1.png",
     "icn_link_state2.png",
     "icn_link_state3.png",
+    # icons packed by ss_atlas.py, what the app actually loads
+    "icons_atlas.png",
+    "icons_atlas_hover.png",
+    "icons_atlas.json",
     # defaults
     "defaults.json",
 ]
@@ -51,5 +55,5 @@ setup(
     app=APP,
     data_files=DATA_FILES,
     options={"py2app": OPTIONS},
-    setup_requires=["py2app", "pysion", "pyperclip", "Pillow"],
+    setup_requires=["py2app", "pysion", "pyperclip"],
 )
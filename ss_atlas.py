@@ -0,0 +1,187 @@
+"""
+Packs the GUI icons into sprite atlases, so the app decodes one PNG instead of twenty.
+
+icons_atlas.png holds everything on screen at startup, icons_atlas_hover.png the hover and
+pressed states, which the GUI only decodes the first time one of them is shown.
+icons_atlas.json maps every source file name to its (x, y, width, height) in its atlas.
+
+Usage:
+    python ss_atlas.py      run again after changing any icon
+
+Only 8 bit RGBA PNGs (what the icons are exported as) are supported, so this needs nothing
+but the standard library.
+"""
+
+from __future__ import annotations
+import json
+import struct
+import zlib
+
+ICONS = (
+    "icn_link",
+    "icn_rotatecw",
+    "icn_rotateccw",
+    "icn_flipv",
+    "icn_fliph",
+    "icn_trash",
+)
+
+ATLASES = {
+    "icons_atlas.png": [
+        "ss_logo_spaced.png",
+        "btn_render_flatter.png",
+        "lbracket1.png",
+        "lbracket2.png",
+    ]
+    + [f"{icon}_state1.png" for icon in ICONS],
+    "icons_atlas_hover.png": [
+        f"{icon}_state{state}.png" for icon in ICONS for state in (2, 3)
+    ],
+}
+MANIFEST = "icons_atlas.json"
+PADDING = 1
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# (x, y, dx, dy) of each Adam7 interlacing pass
+ADAM7 = (
+    (0, 0, 8, 8),
+    (4, 0, 8, 8),
+    (0, 4, 4, 8),
+    (2, 0, 4, 4),
+    (0, 2, 2, 4),
+    (1, 0, 2, 2),
+    (0, 1, 1, 2),
+)
+
+
+# PNG ========================================
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _unfilter(raw: bytes, offset: int, stride: int, height: int) -> tuple[list, int]:
+    """Undoes the row filters of one (sub)image. Returns its rows and where it ends."""
+    rows = []
+    previous = bytearray(stride)
+    for _ in range(height):
+        kind = raw[offset]
+        row = bytearray(raw[offset + 1 : offset + 1 + stride])
+        offset += 1 + stride
+        for i in range(stride):
+            left = row[i - 4] if i >= 4 else 0
+            up = previous[i]
+            if kind == 1:
+                row[i] = row[i] + left & 0xFF
+            elif kind == 2:
+                row[i] = row[i] + up & 0xFF
+            elif kind == 3:
+                row[i] = row[i] + (left + up >> 1) & 0xFF
+            elif kind == 4:
+                up_left = previous[i - 4] if i >= 4 else 0
+                row[i] = row[i] + _paeth(left, up, up_left) & 0xFF
+        rows.append(row)
+        previous = row
+    return rows, offset
+
+
+def read_png(path: str) -> tuple[int, int, bytearray]:
+    """Returns width, height and the RGBA pixels of an 8 bit RGBA PNG."""
+
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError(f"{path} is not a PNG.")
+
+    idat = []
+    position = 8
+    while position < len(data):
+        length, kind = struct.unpack(">I4s", data[position : position + 8])
+        body = data[position + 8 : position + 8 + length]
+        position += 12 + length
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", body)
+            width, height, depth, color, _, _, interlace = header
+        elif kind == b"IDAT":
+            idat.append(body)
+        elif kind == b"IEND":
+            break
+
+    if depth != 8 or color != 6:
+        raise ValueError(f"{path} isn't an 8 bit RGBA PNG.")
+    raw = zlib.decompress(b"".join(idat))
+
+    pixels = bytearray(width * height * 4)
+    offset = 0
+    for x0, y0, dx, dy in ADAM7 if interlace else ((0, 0, 1, 1),):
+        pass_width = (width - x0 + dx - 1) // dx
+        pass_height = (height - y0 + dy - 1) // dy
+        if not pass_width or not pass_height:
+            continue
+        rows, offset = _unfilter(raw, offset, pass_width * 4, pass_height)
+        for j, row in enumerate(rows):
+            y = y0 + j * dy
+            for i in range(pass_width):
+                start = ((y * width) + x0 + i * dx) * 4
+                pixels[start : start + 4] = row[i * 4 : i * 4 + 4]
+    return width, height, pixels
+
+
+def write_png(path: str, width: int, height: int, pixels: bytearray) -> None:
+    """Writes RGBA pixels as a non interlaced PNG."""
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        crc = zlib.crc32(kind + body) & 0xFFFFFFFF
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", crc)
+
+    stride = width * 4
+    raw = b"".join(
+        b"\x00" + bytes(pixels[y * stride : (y + 1) * stride]) for y in range(height)
+    )
+    with open(path, "wb") as file:
+        file.write(PNG_SIGNATURE)
+        header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+        file.write(chunk(b"IHDR", header))
+        file.write(chunk(b"IDAT", zlib.compress(raw, 9)))
+        file.write(chunk(b"IEND", b""))
+
+
+# ATLAS ========================================
+def pack(sources: list[str]) -> tuple[int, int, bytearray, dict[str, list[int]]]:
+    """Lays the sources out left to right. Returns the atlas size, pixels and rects."""
+
+    images = [(source, *read_png(source)) for source in sources]
+    width = sum(w for _, w, _, _ in images) + PADDING * (len(images) - 1)
+    height = max(h for _, _, h, _ in images)
+
+    pixels = bytearray(width * height * 4)
+    rects = {}
+    x = 0
+    for source, w, h, image in images:
+        for y in range(h):
+            start = (y * width + x) * 4
+            pixels[start : start + w * 4] = image[y * w * 4 : (y + 1) * w * 4]
+        rects[source] = [x, 0, w, h]
+        x += w + PADDING
+    return width, height, pixels, rects
+
+
+def build() -> dict[str, dict[str, list[int]]]:
+    manifest = {}
+    for atlas, sources in ATLASES.items():
+        width, height, pixels, rects = pack(sources)
+        write_png(atlas, width, height, pixels)
+        manifest[atlas] = rects
+        print(f"{atlas}: {len(sources)} icons, {width}x{height}")
+
+    with open(MANIFEST, "w") as _:
+        json.dump(manifest, _, indent=4)
+    return manifest
+
+
+if __name__ == "__main__":
+    build()
@@ -0,0 +1,273 @@
+"""
+Headless batch renderer: turns JSON layout specs into Fusion .setting files, no GUI involved.
+
+A spec looks like defaults.json plus a list of screens:
+
+    {
+        "name": "wall_a",
+        "canvas": {"width": 1920, "height": 1080},
+        "margin": {"top": 25, "left": 25, "bottom": 25, "right": 25, "gutter": 25},
+        "grid": {"cols": 12, "rows": 6},
+        "screens": [{"colspan": 6, "rowspan": 6, "col": 1, "row": 1}],
+        "fusion_studio": false,
+        "topology": "tree",
+        "compositing": "crop",
+        "cull_hidden": true,
+        "compact": 6
+    }
+
+"fusion_studio", "topology" ("chain" or "tree"), "compositing" ("mask" or "crop"),
+"cull_hidden" (leave out screens fully covered by later ones) and "compact" (decimals kept,
+whitespace dropped) are optional. Screens that exactly coincide with a later one are
+always left out.
+A spec file holds one spec or a list of them. Names become file names, so they must be
+unique and can't contain path separators.
+
+Usage:
+    python ss_batch.py specs/ more_specs.json -o settings/ [-j 8] [--backend template]
+                       [--cache cache_dir] [--force]
+"""
+
+from __future__ import annotations
+from time import perf_counter
+import hashlib
+import json
+import os
+import sys
+import ss_classes as ss
+from ss_cache import RenderCache
+from ss_export import render_fusion_output, write_atomic
+
+MANIFEST = ".ss_batch.json"
+
+
+# SPECS ========================================
+def build_layout(spec: dict) -> ss.Grid:
+    """Builds Canvas, Margin, Grid and Screens from a layout spec."""
+
+    canvas = spec["canvas"]
+    margin = spec["margin"]
+    grid = spec["grid"]
+
+    ss_canvas = ss.Canvas((canvas["width"], canvas["height"]))
+    ss_margin = ss.Margin(
+        ss_canvas,
+        tlbr=(margin["top"], margin["left"], margin["bottom"], margin["right"]),
+        gutter=margin["gutter"],
+    )
+    ss_grid = ss.Grid(ss_canvas, ss_margin, (grid["cols"], grid["rows"]))
+
+    for screen in spec.get("screens", []):
+        ss.Screen(
+            ss_grid, screen["colspan"], screen["rowspan"], screen["col"], screen["row"]
+        )
+    return ss_grid
+
+
+def spec_hash(spec: dict, backend: str) -> str:
+    """Canonical hash of a spec, used to skip specs that didn't change."""
+    canonical = json.dumps([spec, backend], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def check_name(name: str) -> str:
+    """Raises ValueError if name can't be used as a file name in the output directory."""
+    separators = {os.sep, "/", os.altsep} - {None}
+    if name in ("", ".", "..") or any(sep in name for sep in separators):
+        raise ValueError(f"Spec name {name!r} isn't a plain file name.")
+    return name
+
+
+def load_specs(paths: list[str]) -> list[tuple[str, dict]]:
+    """Returns (name, spec) for every spec in the given files and directories. Raises
+    ValueError for names that aren't plain file names or appear more than once."""
+
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += sorted(
+                os.path.join(path, f) for f in os.listdir(path) if f.endswith(".json")
+            )
+        else:
+            files.append(path)
+
+    specs = []
+    sources = {}  # name -> file it came from, to report duplicates
+    for file in files:
+        with open(file, "r") as _:
+            content = json.load(_)
+        stem = os.path.splitext(os.path.basename(file))[0]
+        if isinstance(content, dict):
+            named = [(content.get("name", stem), content)]
+        else:
+            named = [
+                (spec.get("name", f"{stem}_{i}"), spec)
+                for i, spec in enumerate(content, 1)
+            ]
+        for name, spec in named:
+            check_name(name)
+            if name in sources:
+                raise ValueError(
+                    f"Spec name {name!r} is used in both {sources[name]} and {file}."
+                )
+            sources[name] = file
+            specs.append((name, spec))
+    return specs
+
+
+# RENDERING ========================================
+def render_spec(
+    name: str,
+    spec: dict,
+    output_directory: str,
+    backend: str,
+    cache_directory: str = None,
+) -> int:
+    """Renders one spec to <output_directory>/<name>.setting. Returns the amount of screens
+    exported. With a cache directory, identical layouts are rendered once across specs
+    and runs. The file is only written once rendering succeeded."""
+
+    output = os.path.join(output_directory, f"{check_name(name)}.setting")
+    ss_grid = build_layout(spec)
+    screens = ss_grid.screens or []
+    fusion_studio = spec.get("fusion_studio", False)
+    topology = spec.get("topology", "chain")
+    compositing = spec.get("compositing", "mask")
+    compact = spec.get("compact")
+
+    if spec.get("cull_hidden", False):
+        visible = ss_grid.occlusion()[0]
+    else:  # duplicates never show, only the last of each run is exported
+        visible = [not duplicate for duplicate in ss_grid.duplicates()]
+    screen_values = [
+        screen.get_values() if shows else None
+        for screen, shows in zip(screens, visible)
+    ]
+
+    if cache_directory is not None:
+        render = RenderCache(max_exports=1, directory=cache_directory).render
+    else:
+        render = render_fusion_output
+    text = render(
+        screen_values,
+        ss_grid.canvas.resolution,
+        fusion_studio,
+        backend,
+        topology,
+        compositing,
+        compact,
+    )
+    write_atomic(output, text)
+    return visible.count(True)
+
+
+def render_batch(
+    specs: list[tuple[str, dict]],
+    output_directory: str,
+    workers: int = None,
+    backend: str = "pysion",
+    force: bool = False,
+    cache_directory: str = None,
+) -> dict[str, int | float]:
+    """Renders specs across a process pool, skipping the ones whose output is up to date.
+    A spec that fails counts as failed and leaves the others, and the manifest, alone."""
+
+    os.makedirs(output_directory, exist_ok=True)
+    manifest_path = os.path.join(output_directory, MANIFEST)
+    manifest = {}
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, "r") as _:
+            manifest = json.load(_)
+
+    to_render = {}
+    skipped = 0
+    for name, spec in specs:
+        digest = spec_hash(spec, backend)
+        output = os.path.join(output_directory, f"{name}.setting")
+        if not force and manifest.get(name) == digest and os.path.isfile(output):
+            skipped += 1
+            continue
+        to_render[name] = (spec, digest)
+
+    # only the parent needs these; workers importing ss_batch skip them
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    started = perf_counter()
+    rendered = screens = failed = 0
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = {
+                pool.submit(
+                    render_spec, name, spec, output_directory, backend, cache_directory
+                ): name
+                for name, (spec, _) in to_render.items()
+            }
+            for job in as_completed(jobs):
+                name = jobs[job]
+                try:
+                    screens += job.result()
+                except (KeyError, TypeError, ValueError) as error:
+                    print(f"{name}: invalid spec ({error!r})", file=sys.stderr)
+                    failed += 1
+                    continue
+                except Exception as error:
+                    print(f"{name}: render failed ({error!r})", file=sys.stderr)
+                    failed += 1
+                    continue
+                manifest[name] = to_render[name][1]
+                rendered += 1
+    finally:
+        # specs rendered before an interruption don't render again next run
+        write_atomic(manifest_path, json.dumps(manifest, indent=4, sort_keys=True))
+    elapsed = perf_counter() - started
+
+    return {
+        "rendered": rendered,
+        "skipped": skipped,
+        "failed": failed,
+        "screens": screens,
+        "seconds": elapsed,
+    }
+
+
+def main(argv: list[str] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Render SplitScreener layout specs to Fusion .setting files."
+    )
+    parser.add_argument("specs", nargs="+", help="spec files or directories")
+    parser.add_argument("-o", "--output", required=True, help="output directory")
+    parser.add_argument("-j", "--jobs", type=int, help="worker processes")
+    parser.add_argument("--backend", default="pysion", choices=("pysion", "template"))
+    parser.add_argument("--cache", help="render cache directory shared between runs")
+    parser.add_argument("--force", action="store_true", help="render unchanged specs")
+    args = parser.parse_args(argv)
+
+    try:
+        specs = load_specs(args.specs)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    report = render_batch(
+        specs,
+        args.output,
+        args.jobs,
+        args.backend,
+        args.force,
+        args.cache,
+    )
+
+    seconds = report["seconds"]
+    rate = report["rendered"] / seconds if seconds else 0.0
+    print(
+        f"Rendered {report['rendered']} specs ({report['screens']} screens) "
+        f"in {seconds:.2f}s, {rate:.1f} specs/s. "
+        f"Skipped {report['skipped']} unchanged, {report['failed']} failed."
+    )
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
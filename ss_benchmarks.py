@@ -0,0 +1,586 @@
+"""
+Micro benchmarks for the SplitScreener model and exporter.
+
+Usage:
+    python ss_benchmarks.py             runs every benchmark
+    python ss_benchmarks.py grid_layout runs only the named ones
+
+Exits 1 if a budget check (import_time, autosave) fails.
+"""
+
+from __future__ import annotations
+import gc
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+import ss_classes as ss
+import ss_export
+import ss_history
+import ss_journal
+
+
+# helpers
+def report(label: str, seconds: float, runs: int = 1) -> None:
+    print(f"{label:<48}{seconds / runs * 1000:>10.3f} ms")
+
+
+def build_grid(layout: tuple[int, int]) -> ss.Grid:
+    canvas = ss.Canvas((7680, 4320))
+    margin = ss.Margin(canvas, 20, gutter=10)
+    return ss.Grid(canvas, margin, layout)
+
+
+def build_wall(screens: int) -> ss.Grid:
+    """A grid with `screens` 1x1 screens, as many columns as needed."""
+    cols = int(screens**0.5) + 1
+    grid = build_grid((cols, screens // cols + 1))
+    for i in range(screens):
+        ss.Screen(grid, 1, 1, i % cols + 1, i // cols + 1)
+    return grid
+
+
+# BENCHMARKS ========================================
+def bench_grid_layout() -> None:
+    """Margin / gutter edits on large LED wall grids, reading back every cell."""
+
+    for layout in ((96, 54), (192, 108)):
+        grid = build_grid(layout)
+        cells = ss.GridCell.generate_all(grid)
+
+        def edit():
+            grid.margin.all = grid.margin._top_px % 40 + 1
+
+        def edit_and_read():
+            edit()
+            for cell in cells:
+                cell.x, cell.y, cell.width, cell.height
+
+        runs = 20
+        label = f"grid_layout {layout[0]}x{layout[1]}"
+        report(f"{label} edit", timeit.timeit(edit, number=runs), runs)
+        report(f"{label} edit + read cells", timeit.timeit(edit_and_read, number=runs), runs)
+
+
+def bench_cell_generation() -> None:
+    """GridCell.generate_all should stay linear in cell count."""
+
+    for side in (50, 100, 200):
+        grid = build_grid((side, side))
+        seconds = timeit.timeit(lambda: ss.GridCell.generate_all(grid), number=1)
+        report(f"cell_generation {side}x{side} ({side * side} cells)", seconds)
+
+
+def bench_observer_leak() -> None:
+    """Building 10k throwaway layouts on one Canvas should not slow down its resizes."""
+
+    canvas = ss.Canvas((1920, 1080))
+    grid = ss.Grid(canvas, ss.Margin(canvas, 20, gutter=10))
+    ss.Screen(grid, 3, 2, 1, 1)
+
+    def resize():
+        canvas.width = 1920 if canvas.width != 1920 else 1080
+
+    runs = 200
+    tracemalloc.start()
+    report("observer_leak resize, 1 layout", timeit.timeit(resize, number=runs), runs)
+    before = tracemalloc.get_traced_memory()[0]
+
+    for _ in range(10_000):
+        ss.Screen(ss.Grid(canvas, ss.Margin(canvas, 20, gutter=10)), 3, 2, 1, 1)
+    gc.collect()  # Grid <-> Screen is a reference cycle
+
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    report("observer_leak resize, after 10k layouts", timeit.timeit(resize, number=runs), runs)
+    print(f"{'observer_leak retained memory':<48}{(after - before) / 1024:>10.1f} KiB")
+    print(f"{'observer_leak canvas subscribers':<48}{len(canvas._children):>10}")
+
+
+def bench_cell_pool() -> None:
+    """Hundreds of GUI style refreshes (edit + regenerate cells) on a pooled grid."""
+
+    grid = build_grid((48, 27))
+    ss.Screen(grid, 3, 2, 1, 1)
+
+    def refresh():
+        grid.margin.gutter = grid.margin._gutter_px % 30 + 1
+        grid.cols = 48 if grid.cols != 48 else 47
+        ss.GridCell.generate_all(grid)
+
+    runs = 300
+    report("cell_pool refresh 48x27", timeit.timeit(refresh, number=runs), runs)
+    print(f"{'cell_pool pooled cells':<48}{len(grid.cells):>10}")
+    print(f"{'cell_pool callbacks per compute':<48}{grid.callbacks_per_compute:>10}")
+
+
+def bench_screen_memory() -> None:
+    """Memory per Screen with __slots__ against the same class with a __dict__."""
+
+    class DictScreen(ss.Screen):  # no __slots__, so instances get a __dict__ again
+        pass
+
+    for cls in (ss.Screen, DictScreen):
+        grid = build_grid((96, 54))
+        gc.collect()
+        tracemalloc.start()
+        for i in range(10_000):
+            cls(grid, 2, 2, i % 95 + 1, i % 53 + 1)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{'screen_memory ' + cls.__name__ + ' per screen':<48}{size / 10_000:>10.0f} B")
+
+    screen = grid.screens[0]
+    corners = lambda: (screen.corners, screen.expanded_corners)
+    report("screen_memory corners access x1000", timeit.timeit(corners, number=1000))
+
+
+def bench_hit_test() -> None:
+    """Pointer -> cell / screen lookups against a linear scan over cell corners."""
+
+    grid = build_grid((96, 54))
+    cells = ss.GridCell.generate_all(grid)
+    for i in range(200):
+        ss.Screen(grid, 3, 3, i % 90 + 1, i % 50 + 1)
+    point = (0.9, 0.9)
+
+    def scan():
+        x, y = point
+        for cell in cells:
+            area = cell.corners
+            if area["top_left"][0] < x < area["top_right"][0]:
+                if area["bottom_left"][1] < y < area["top_left"][1]:
+                    return cell.index
+
+    runs = 100
+    report("hit_test linear scan 96x54", timeit.timeit(scan, number=runs), runs)
+    report("hit_test cell_at 96x54", timeit.timeit(lambda: grid.cell_at(*point), number=runs), runs)
+    report("hit_test screen_at, 200 screens", timeit.timeit(lambda: grid.screen_at(*point), number=runs), runs)
+
+
+def bench_export() -> None:
+    """render_fusion_output against streaming into a file at 10, 100 and 1000 screens."""
+
+    for amount in (10, 100, 1000):
+        grid = build_wall(amount)
+        values = [screen.get_values() for screen in grid.screens]
+        resolution = grid.canvas.resolution
+        label = f"export {amount} screens"
+
+        render = lambda: ss_export.render_fusion_output(values, resolution)
+        report(f"{label} render", timeit.timeit(render, number=5), 5)
+
+        with open(os.devnull, "w") as devnull:
+            stream = lambda: ss_export.write_fusion_output(devnull, values, resolution)
+            report(f"{label} stream", timeit.timeit(stream, number=5), 5)
+
+            for name, function in (("render", render), ("stream", stream)):
+                tracemalloc.start()
+                function()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"{label + ' ' + name + ' peak memory':<48}{peak / 1024:>10.1f} KiB")
+
+
+def bench_template_backend() -> None:
+    """Per-screen cost of the pysion and template backends, and whether they match."""
+
+    grid = build_wall(1000)
+    values = [screen.get_values() for screen in grid.screens]
+    resolution = grid.canvas.resolution
+
+    outputs = {}
+    for backend in ss_export.SCREEN_BACKENDS:
+        render = lambda: ss_export.render_fusion_output(values, resolution, backend=backend)
+        outputs[backend] = render()
+        seconds = timeit.timeit(render, number=5) / 5
+        print(f"{'template_backend ' + backend + ' per screen':<48}{seconds / len(values) * 1e6:>10.2f} us")
+
+    identical = outputs["pysion"] == outputs["template"]
+    print(f"{'template_backend byte identical output':<48}{str(identical):>10}")
+
+
+def bench_merge_topology() -> None:
+    """Longest Merge chain and render time of the chain and tree topologies."""
+
+    def depth(amount: int, topology: str) -> int:
+        if topology == "chain":
+            return amount
+        tree = ss_export.MergeTree()
+        tree.push("SSCanvas", 0, -1)
+        for i in range(amount):
+            tree.push(f"SSMerge{i + 1}", 1, i)
+        tree.close()
+        return tree.depth
+
+    for amount in (16, 64, 256, 1024):
+        grid = build_wall(amount)
+        values = [screen.get_values() for screen in grid.screens]
+        resolution = grid.canvas.resolution
+
+        for topology in ss_export.TOPOLOGIES:
+            label = f"merge_topology {amount} screens {topology}"
+            output = ss_export.render_fusion_output(values, resolution, topology=topology)
+            print(f"{label + ' depth':<48}{depth(amount, topology):>10}")
+            print(f"{label + ' Merge nodes':<48}{output.count(' = Merge {'):>10}")
+            render = lambda: ss_export.render_fusion_output(
+                values, resolution, topology=topology
+            )
+            report(f"{label} render", timeit.timeit(render, number=5), 5)
+
+
+def bench_compositing() -> None:
+    """Per screen, the full canvas mask Fusion renders against the footprint a cropped
+    foreground covers once merged, at 8K."""
+
+    for amount in (16, 256):
+        grid = build_wall(amount)
+        values = [screen.get_values() for screen in grid.screens]
+        resolution = grid.canvas.resolution
+        label = f"compositing {amount} screens"
+
+        # every RectangleMask renders at MaskWidth x MaskHeight = canvas resolution
+        mask_pixels = resolution[0] * resolution[1]
+        crop_pixels = 0
+        for screen in values:
+            crop = ss_export.crop_rectangle(
+                resolution, screen["Width"], screen["Height"], screen["Size"]
+            )
+            crop_pixels += crop[2] * crop[3] * screen["Size"] ** 2
+        print(f"{label + ' mask Mpx per screen':<48}{mask_pixels / 1e6:>10.2f}")
+        print(f"{label + ' crop Mpx per screen':<48}{crop_pixels / amount / 1e6:>10.2f}")
+
+        for compositing in ss_export.COMPOSITING:
+            render = lambda: ss_export.render_fusion_output(
+                values, resolution, compositing=compositing
+            )
+            report(f"{label} {compositing} render", timeit.timeit(render, number=5), 5)
+
+
+def bench_occlusion() -> None:
+    """Occlusion pass on a wall where every other screen is a duplicate or buried
+    under a bigger one, and the nodes culling saves."""
+
+    grid = build_grid((96, 54))
+    for i in range(500):
+        col, row = i % 90 + 1, i % 50 + 1
+        ss.Screen(grid, 2, 2, col, row)
+        if i % 2:
+            ss.Screen(grid, 2, 2, col, row)  # coincident duplicate
+        else:
+            ss.Screen(grid, 4, 4, max(col - 1, 1), max(row - 1, 1))  # buries it
+
+    runs = 20
+    report("occlusion 1000 screens", timeit.timeit(grid.occlusion, number=runs), runs)
+
+    visible, duplicates = grid.occlusion()
+    hidden = visible.count(False)
+    saved = hidden * ss_export.nodes_per_screen()
+    print(f"{'occlusion hidden screens':<48}{hidden:>10}")
+    print(f"{'occlusion of which coincident duplicates':<48}{duplicates:>10}")
+    print(f"{'occlusion nodes saved':<48}{saved:>10}")
+
+
+def bench_occupancy() -> None:
+    """Overlap checks and free space queries on the occupancy index against scanning
+    every screen, with 1000 screens on a 96x54 grid."""
+
+    grid = build_grid((96, 54))
+    for i in range(1000):
+        ss.Screen(grid, 2, 2, i % 48 * 2 + 1, i // 48 * 2 + 1)
+    rect = (95, 53, 2, 2)
+
+    def scan():
+        col, row, colspan, rowspan = rect
+        for screen in grid.screens:
+            if (
+                screen.col < col + colspan
+                and col < screen.col + screen.colspan
+                and screen.row < row + rowspan
+                and row < screen.row + screen.rowspan
+            ):
+                return False
+        return True
+
+    runs = 1000
+    report("occupancy is_free scan 1000 screens", timeit.timeit(scan, number=runs), runs)
+    is_free = lambda: grid.occupancy.is_free(*rect)
+    report("occupancy is_free index", timeit.timeit(is_free, number=runs), runs)
+
+    screen = grid.screens[-1]
+    move = lambda: screen.edit(2, 2, screen.col % 90 + 1, screen.row)
+    report("occupancy screen edit (index update)", timeit.timeit(move, number=runs), runs)
+
+    def largest():
+        screen.edit(2, 2, screen.col % 90 + 1, screen.row)  # invalidates the cache
+        return grid.occupancy.largest_free_rect()
+
+    report("occupancy largest_free_rect after an edit", timeit.timeit(largest, number=100), 100)
+    cached = lambda: grid.occupancy.largest_free_rect()
+    report("occupancy largest_free_rect cached", timeit.timeit(cached, number=runs), runs)
+
+
+def bench_compact() -> None:
+    """Payload size of compact output against pysion's, and the geometry error it
+    introduces in pixels, which has to stay under half a pixel."""
+
+    grid = build_wall(1000)
+    values = [screen.get_values() for screen in grid.screens]
+    resolution = grid.canvas.resolution
+    width, height = resolution
+    axes = {  # pixels per normalized unit
+        "Width": width,
+        "Center.X": width,
+        "Height": height,
+        "Center.Y": height,
+        "Size": max(width, height),
+    }
+
+    full = ss_export.render_fusion_output(values, resolution)
+    print(f"{'compact 1000 screens full size':<48}{len(full) / 1024:>10.1f} KiB")
+
+    for decimals in sorted({8, ss_export.COMPACT_DECIMALS, 4}, reverse=True):
+        output = ss_export.render_fusion_output(values, resolution, compact=decimals)
+        error = max(
+            abs(round(screen[key], decimals) - screen[key]) * pixels
+            for screen in values
+            for key, pixels in axes.items()
+        )
+        label = f"compact 1000 screens, {decimals} decimals"
+        print(f"{label + ' size':<48}{len(output) / 1024:>10.1f} KiB")
+        print(f"{label + ' saved':<48}{1 - len(output) / len(full):>10.1%}")
+        print(f"{label + ' max error px':<48}{error:>10.4f}")
+        print(f"{label + ' sub-pixel':<48}{str(error < 0.5):>10}")
+
+    render = lambda: ss_export.render_fusion_output(values, resolution)
+    report("compact 1000 screens full render", timeit.timeit(render, number=5), 5)
+    render = lambda: ss_export.render_fusion_output(
+        values, resolution, compact=ss_export.COMPACT_DECIMALS
+    )
+    report("compact 1000 screens compact render", timeit.timeit(render, number=5), 5)
+
+
+def bench_startup() -> None:
+    """Process start to the GUI's first painted frame. Needs a display. Every run
+    autosaves to a fresh temporary directory, never to the user's."""
+
+    directory = os.path.dirname(os.path.abspath(__file__))  # assets are loaded relatively
+
+    times = []
+    for _ in range(5):
+        with tempfile.TemporaryDirectory() as autosave:
+            env = {
+                **os.environ,
+                "SS_STARTUP_PROBE": "1",
+                "SS_AUTOSAVE_DIRECTORY": autosave,
+            }
+            started = time.time()
+            result = subprocess.run(
+                [sys.executable, "SplitScreener.py"],
+                cwd=directory,
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+        painted = [
+            float(line.split()[-1])
+            for line in result.stdout.splitlines()
+            if line.startswith("first paint")
+        ]
+        if not painted:
+            error = (result.stderr.strip().splitlines() or ["no output"])[-1]
+            print(f"{'startup skipped, the GUI did not start':<48}({error})")
+            return
+        times.append(painted[0] - started)
+
+    report("startup to first paint, mean of 5", sum(times), len(times))
+    report("startup to first paint, best of 5", min(times))
+
+
+def bench_history() -> None:
+    """10k single screen edits on a 500 screen wall: recording each one as an undo
+    step, the memory the steps keep, then undoing and redoing all of them."""
+
+    grid = build_wall(500)
+    cols, rows = grid.composition
+    history = ss_history.History(grid, limit=None)
+    first = [record[1:] for record in history.current.screens]
+    steps = 10_000
+    moves = [(i * 7919 % 500, i % cols + 1, i * 31 % rows + 1) for i in range(steps)]
+
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    for index, col, row in moves:
+        grid.screens[index].edit(1, 1, col, row)
+        history.commit()
+    elapsed = time.perf_counter() - started
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    report("history edit + commit, 500 screens", elapsed, steps)
+    print(f"{'history memory per step':<48}{size / steps:>10.0f} B")
+
+    # what a step would keep if it copied every record
+    full = ss_history.ScreenRecords.from_records(list(history.current.screens))
+    gc.collect()
+    tracemalloc.start()
+    copies = [
+        ss_history.ScreenRecords.from_records([record._replace() for record in full])
+        for _ in range(100)
+    ]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{'full snapshot per step':<48}{size / len(copies):>10.0f} B")
+
+    started = time.perf_counter()
+    while history.undo() is not None:
+        pass
+    report("history undo, per step", time.perf_counter() - started, steps)
+    live = [(s.colspan, s.rowspan, s.col, s.row) for s in grid.screens]
+    print(f"{'history undoing all restores the wall':<48}{str(live == first):>10}")
+
+    started = time.perf_counter()
+    while history.redo() is not None:
+        pass
+    report("history redo, per step", time.perf_counter() - started, steps)
+
+
+RESTORE_BUDGET_MS = 50
+
+
+def bench_autosave() -> bool:
+    """Journaling single screen edits on a 500 screen wall, and restoring after a
+    crash right before a snapshot, for short and long sessions. Returns False when
+    a restore goes over RESTORE_BUDGET_MS."""
+
+    within_budget = True
+    sessions = (
+        (1_000, ss_journal.SNAPSHOT_EVERY),
+        (10_000, ss_journal.SNAPSHOT_EVERY),
+        (10_000, None),  # journal only, for comparison
+    )
+    for steps, snapshot_every in sessions:
+        grid = build_wall(500)
+        cols, rows = grid.composition
+        history = ss_history.History(grid, limit=None)
+        with tempfile.TemporaryDirectory() as directory:
+            journal = ss_journal.Journal(directory, 0, snapshot_every or steps)
+            journal.start(history.current)
+
+            started = time.perf_counter()
+            for i in range(1, steps):  # the crash comes just before a snapshot
+                grid.screens[i * 7919 % 500].edit(1, 1, i % cols + 1, i * 31 % rows + 1)
+                history.commit()
+                journal.record(history.current)
+            elapsed = time.perf_counter() - started
+
+            journal._queue.put(None)  # crash: stop without the closing snapshot
+            journal._thread.join()
+
+            started = time.perf_counter()
+            layout, _ = ss_journal.restore(directory)
+            restored = time.perf_counter() - started
+
+        label = f"{steps} steps" + ("" if snapshot_every else " journal only")
+        report(f"autosave step, {label}", elapsed, steps - 1)
+        report(f"autosave restore, {label}", restored)
+        if snapshot_every and restored * 1000 > RESTORE_BUDGET_MS:
+            within_budget = False
+        same = list(layout.screens) == list(history.current.screens)
+        print(f"{'autosave restore ok, ' + label:<48}{str(same):>10}")
+
+    print(f"{'autosave restore budget':<48}{RESTORE_BUDGET_MS:>10} ms")
+    return within_budget
+
+
+CORE_MODULES = (
+    "ss_classes",
+    "ss_export",
+    "ss_cache",
+    "ss_batch",
+    "ss_history",
+    "ss_journal",
+)
+GUI_MODULES = ("tkinter", "PIL", "pyperclip", "pysion")
+IMPORT_BUDGET_MS = 30
+
+
+def bench_import_time() -> bool:
+    """Import time of the core modules, from `python -X importtime`. Returns False
+    when they go over IMPORT_BUDGET_MS or pull in any GUI or export dependency."""
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # time the imports, not the compiles
+    code = (
+        f"import sys, {', '.join(CORE_MODULES)}\n"
+        f"print(*(m for m in {GUI_MODULES!r} if m in sys.modules))"
+    )
+
+    runs = []
+    for _ in range(6):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=directory,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+        cumulative = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, total, name = line.split("|")
+            if name.strip() in CORE_MODULES and not name.startswith("  "):
+                cumulative[name.strip()] = int(total) / 1000
+        runs.append(cumulative)
+    loaded = result.stdout.split()
+    best = min(runs[1:], key=lambda run: sum(run.values()))  # first run warms pycache
+
+    for name in CORE_MODULES:
+        print(f"{'import ' + name:<48}{best.get(name, 0):>10.3f} ms")
+    total = sum(best.values())
+    report(f"core imports, budget {IMPORT_BUDGET_MS} ms", total / 1000)
+    if loaded:
+        print(f"{'core imports pull in':<48}{' '.join(loaded):>10}")
+    return total <= IMPORT_BUDGET_MS and not loaded
+
+
+BENCHMARKS = {
+    "grid_layout": bench_grid_layout,
+    "cell_generation": bench_cell_generation,
+    "observer_leak": bench_observer_leak,
+    "cell_pool": bench_cell_pool,
+    "screen_memory": bench_screen_memory,
+    "hit_test": bench_hit_test,
+    "export": bench_export,
+    "template_backend": bench_template_backend,
+    "merge_topology": bench_merge_topology,
+    "compositing": bench_compositing,
+    "occlusion": bench_occlusion,
+    "occupancy": bench_occupancy,
+    "compact": bench_compact,
+    "startup": bench_startup,
+    "history": bench_history,
+    "autosave": bench_autosave,
+    "import_time": bench_import_time,
+}
+
+
+def main(names: list[str]) -> int:
+    """Runs the benchmarks; exits 1 if a budget check (returning False) failed."""
+
+    failed = [name for name in names or BENCHMARKS if BENCHMARKS[name]() is False]
+    if failed:
+        print(f"over budget: {', '.join(failed)}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,202 @@
+"""
+Content addressed cache for Fusion exports.
+
+Whole exports are keyed by a hash of the resolution, the fusion_studio flag, the backend, the
+merge topology, the compositing mode, the compact precision and every screen's values. They
+live in an in-memory LRU and, optionally, in a size bounded directory shared between runs and
+processes. Per screen node groups are cached too, so moving one screen only renders that
+screen again.
+"""
+
+from __future__ import annotations
+from collections import OrderedDict
+from collections.abc import Iterable
+import hashlib
+import json
+import os
+from ss_export import iter_fusion_output, screen_backend
+
+SCREEN_KEYS = ("Width", "Height", "Center.X", "Center.Y", "Size")
+
+
+def export_key(
+    screen_values: Iterable[dict[str, float]],
+    resolution: tuple[int, int],
+    fusion_studio: bool = False,
+    backend: str = "pysion",
+    topology: str = "chain",
+    compositing: str = "mask",
+    compact: int = None,
+) -> str:
+    """Canonical hash of everything an export depends on."""
+    canonical = json.dumps(
+        [
+            list(resolution),
+            fusion_studio,
+            backend,
+            topology,
+            compositing,
+            compact,
+            [
+                None if screen is None else [screen[key] for key in SCREEN_KEYS]
+                for screen in screen_values
+            ],
+        ],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class RenderCache:
+    """LRU of whole exports and screen node groups, with an optional on-disk tier."""
+
+    def __init__(
+        self,
+        max_exports: int = 32,
+        max_fragments: int = 4096,
+        directory: str | os.PathLike = None,
+        max_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.max_exports = max_exports
+        self.max_fragments = max_fragments
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+        self._exports: OrderedDict[str, str] = OrderedDict()
+        self._fragments: OrderedDict[tuple, str] = OrderedDict()
+
+        self.hits = self.disk_hits = self.misses = self.fragment_hits = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    # EXPORTS ========================================
+    def render(
+        self,
+        screen_values: list[dict[str, float]],
+        resolution: tuple[int, int],
+        fusion_studio: bool = False,
+        backend: str = "pysion",
+        topology: str = "chain",
+        compositing: str = "mask",
+        compact: int = None,
+    ) -> str:
+        """Same output as ss_export.render_fusion_output, served from cache when possible."""
+
+        key = export_key(
+            screen_values,
+            resolution,
+            fusion_studio,
+            backend,
+            topology,
+            compositing,
+            compact,
+        )
+
+        output = self._exports.get(key)
+        if output is not None:
+            self._exports.move_to_end(key)
+            self.hits += 1
+            return output
+
+        output = self._read_disk(key)
+        if output is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            output = "".join(
+                iter_fusion_output(
+                    screen_values,
+                    resolution,
+                    fusion_studio,
+                    self._fragment_backend(backend, compositing),
+                    topology,
+                    compact=compact,
+                )
+            )
+            self._write_disk(key, output)
+
+        self._exports[key] = output
+        if len(self._exports) > self.max_exports:
+            self._exports.popitem(last=False)
+        return output
+
+    def clear(self) -> None:
+        self._exports.clear()
+        self._fragments.clear()
+
+    # FRAGMENTS ========================================
+    def _fragment_backend(self, backend: str, compositing: str = "mask"):
+        create_screen = screen_backend(backend, compositing)
+        fragments = self._fragments
+
+        def cached_screen(last_tool_name, resolution, index, fusion_studio, **inputs):
+            key = (backend, compositing, last_tool_name, tuple(resolution), index)
+            key += (fusion_studio, *inputs.values())
+
+            fragment = fragments.get(key)
+            if fragment is not None:
+                fragments.move_to_end(key)
+                self.fragment_hits += 1
+                return fragment
+
+            fragment = create_screen(
+                last_tool_name, resolution, index, fusion_studio, **inputs
+            )
+            fragments[key] = fragment
+            if len(fragments) > self.max_fragments:
+                fragments.popitem(last=False)
+            return fragment
+
+        return cached_screen
+
+    # DISK TIER ========================================
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.setting")
+
+    def _read_disk(self, key: str) -> str | None:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r") as file:
+                output = file.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # eviction goes by last use
+        except FileNotFoundError:  # evicted by another process since we read it
+            pass
+        return output
+
+    def _write_disk(self, key: str, output: str) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w") as file:
+            file.write(output)
+        os.replace(temporary, path)
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Removes least recently used entries until the directory fits in max_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if not entry.name.endswith(".setting"):
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # another process got there first
+                pass
+            total -= size
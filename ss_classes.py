@@ -1,31 +1,282 @@
 from __future__ import annotations
-from typing import Callable
+from array import array
+from collections.abc import Callable
+import weakref
 
 
 # helper function for Screen and Grid classes
 def get_coords(item, matrix: list[list]) -> tuple[int, int]:
-    for i, v in enumerate(matrix):
-        if item in v:
-            y = i
-            x = v.index(item)
+    """Returns (col, row) of a 1-based cell index. Matrix rows are all the same length."""
+    y, x = divmod(item - 1, len(matrix[0]))
     return x + 1, y + 1
 
 
+# TRANSACTIONS ========================================
+class Transaction:
+    """Batches model edits on one Canvas tree. While a transaction is open, computes
+    are only marked as pending; on commit each pending compute runs exactly once,
+    parents first (Margin before Grid before Screens). If the with body raises, the
+    edits made before it stay, like without a batch, so the pending computes still
+    run before the exception goes on."""
+
+    # open transactions, by the root Canvas of the tree they batch
+    open: dict[Canvas, Transaction] = {}
+
+    def __init__(self, canvas: Canvas) -> None:
+        self.canvas = canvas
+        self._pending: dict[int, dict[Callable, None]] = {}
+        self._outer: Transaction = None
+
+    def __enter__(self) -> Transaction:
+        self._outer = Transaction.open.get(self.canvas)
+        if self._outer is None:
+            Transaction.open[self.canvas] = self
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        if self._outer is not None:  # nested, the outermost transaction commits
+            return
+        try:
+            self.commit()  # even on errors, derived values follow the raw fields
+        finally:
+            del Transaction.open[self.canvas]
+
+    def mark(self, function: Callable) -> None:
+        depth = function.__self__._depth
+        self._pending.setdefault(depth, {})[function] = None
+
+    def discard(self, function: Callable) -> None:
+        """Unmarks function, e.g. the compute of a screen deleted in the batch."""
+        for bucket in self._pending.values():
+            bucket.pop(function, None)
+
+    def commit(self) -> None:
+        while self._pending:
+            bucket = self._pending.pop(min(self._pending))
+            for function in bucket:
+                function()
+
+
+def schedule(function: Callable) -> None:
+    """Calls function now, or once when the Transaction open on its tree commits.
+    Computes of model objects (anything with a root) are batched and need a _depth;
+    plain functions and methods of anything else are called right away."""
+    if not Transaction.open:
+        function()
+        return
+    owner = getattr(function, "__self__", None)
+    transaction = Transaction.open.get(getattr(owner, "root", None))
+    if transaction is None:
+        function()
+        return
+    if not hasattr(owner, "_depth"):
+        raise TypeError(f"{function!r} has no _depth, it can't be batched.")
+    transaction.mark(function)
+
+
+# OBSERVERS ========================================
+class Observers:
+    """Callbacks subscribed to one model object. Bound methods are held weakly,
+    so a dead Margin, Grid or Screen drops out on its own."""
+
+    def __init__(self) -> None:
+        self._callbacks: dict[int, Callable[[], Callable]] = {}
+        self._next_key = 0
+        self.notified = 0  # callbacks called by the last notify, for instrumentation
+
+    def __len__(self) -> int:
+        return len(self._callbacks)
+
+    def subscribe(self, function: Callable) -> Callable[[], None]:
+        """Returns a handle that unsubscribes function when called."""
+        key = self._next_key
+        self._next_key += 1
+        callbacks = self._callbacks
+
+        if hasattr(function, "__self__"):
+            ref = weakref.WeakMethod(function, lambda _: callbacks.pop(key, None))
+        else:
+            ref = lambda: function  # plain functions and lambdas are kept alive
+
+        callbacks[key] = ref
+        return lambda: callbacks.pop(key, None)
+
+    def notify(self) -> None:
+        dead = []
+        for key, ref in list(self._callbacks.items()):
+            function = ref()
+            if function is None:
+                dead.append(key)
+                continue
+            schedule(function)
+        for key in dead:
+            del self._callbacks[key]
+        self.notified = len(self._callbacks)
+
+    def send(self, *args) -> None:
+        """Calls every callback with args right away, open transaction or not. For
+        subscribers outside the model that record changes instead of computing."""
+        for function in [ref() for ref in self._callbacks.values()]:
+            if function is not None:
+                function(*args)
+
+
+# OCCUPANCY ========================================
+class Occupancy:
+    """Which grid cells are taken by screens. Kept up to date by Screen.compute and
+    Screen.delete, so queries never scan the screens.
+
+    Each row is an int with one bit per column, set while at least one screen covers
+    that cell. Per cell owner counts let overlapping screens come and go."""
+
+    def __init__(self, grid: Grid) -> None:
+        self.grid = grid
+        self._bits: dict[int, int] = {}  # row -> taken columns
+        self._owners: dict[tuple[int, int], int] = {}  # (col, row) -> screens covering
+        self._placed: dict[Screen, tuple[int, int, int, int]] = {}  # col, row, spans
+        self._largest: tuple[int, int, int, int] | None = None
+        self._largest_key: tuple = None
+        # called with every screen placed, moved or removed, e.g. by History
+        self.listeners = Observers()
+
+    def __len__(self) -> int:
+        return len(self._owners)
+
+    def __contains__(self, screen: Screen) -> bool:
+        """Whether screen is placed, i.e. not deleted."""
+        return screen in self._placed
+
+    # UPDATES ========================================
+    def place(self, screen: Screen) -> None:
+        """Moves screen to where it is now. Does nothing if it didn't move."""
+        rect = (screen._col, screen._row, screen._colspan, screen._rowspan)
+        placed = self._placed.get(screen)
+        if placed == rect:
+            return
+        if placed is not None:
+            self._update(placed, -1)
+        self._update(rect, 1)
+        self._placed[screen] = rect
+        self.listeners.send(screen)
+
+    def remove(self, screen: Screen) -> None:
+        placed = self._placed.pop(screen, None)
+        if placed is not None:
+            self._update(placed, -1)
+            self.listeners.send(screen)
+
+    def _update(self, rect: tuple[int, int, int, int], step: int) -> None:
+        col, row, colspan, rowspan = rect
+        bits = self._bits
+        owners = self._owners
+        for r in range(row, row + rowspan):
+            for c in range(col, col + colspan):
+                count = owners.get((c, r), 0) + step
+                if count:
+                    owners[(c, r)] = count
+                    if count == 1 and step == 1:
+                        bits[r] = bits.get(r, 0) | 1 << c - 1
+                    continue
+                del owners[(c, r)]
+                bits[r] &= ~(1 << c - 1)
+        self._largest_key = None
+
+    # QUERIES ========================================
+    def is_free(self, col: int, row: int, colspan: int = 1, rowspan: int = 1) -> bool:
+        """Whether a rect lies inside the grid and no screen covers any of its cells."""
+        if col < 1 or row < 1:
+            return False
+        if col + colspan - 1 > self.grid.cols or row + rowspan - 1 > self.grid.rows:
+            return False
+        mask = (1 << colspan) - 1 << col - 1
+        bits = self._bits
+        for r in range(row, row + rowspan):
+            if bits.get(r, 0) & mask:
+                return False
+        return True
+
+    def cells_of(self, screen: Screen) -> list[int]:
+        """Indexes of the cells screen covers, as last placed. Parts left outside a
+        grid that shrank since are clipped."""
+        placed = self._placed.get(screen)
+        if placed is None:
+            return []
+        col, row, colspan, rowspan = placed
+        cols, rows = self.grid.composition
+        return [
+            (r - 1) * cols + c
+            for r in range(row, min(row + rowspan, rows + 1))
+            for c in range(col, min(col + colspan, cols + 1))
+        ]
+
+    def overlaps(self, screen: Screen) -> bool:
+        """Whether any other screen covers one of screen's cells."""
+        placed = self._placed.get(screen)
+        if placed is None:
+            return False
+        col, row, colspan, rowspan = placed
+        owners = self._owners
+        return any(
+            owners[(c, r)] > 1
+            for r in range(row, row + rowspan)
+            for c in range(col, col + colspan)
+        )
+
+    def largest_free_rect(self) -> tuple[int, int, int, int] | None:
+        """(col, row, colspan, rowspan) of the biggest free area, None if the grid is full.
+        Cached until a screen moves or the composition changes."""
+        key = self.grid.composition
+        if self._largest_key == key:
+            return self._largest
+
+        cols, rows = key
+        heights = [0] * (cols + 1)  # free cells stacked up to the current row, plus a 0
+        best_area = 0
+        best = None
+        for row in range(1, rows + 1):
+            taken = self._bits.get(row, 0)
+            for c in range(cols):
+                heights[c] = 0 if taken >> c & 1 else heights[c] + 1
+
+            # largest rectangle in a histogram, with a stack of increasing heights
+            stack: list[int] = []
+            for c in range(cols + 1):
+                while stack and heights[stack[-1]] >= heights[c]:
+                    height = heights[stack.pop()]
+                    left = stack[-1] + 1 if stack else 0
+                    area = height * (c - left)
+                    if area > best_area:
+                        best_area = area
+                        best = (left + 1, row - height + 1, c - left, height)
+                stack.append(c)
+
+        self._largest = best
+        self._largest_key = key
+        return best
+
+
 class Canvas:
     """Canvas object. Sizes defined and returned in pixels."""
 
-    _children: list[Callable] = []
+    _depth = 0
 
     def __init__(self, resolution: tuple[int, int] = (1920, 1080)):
         self._width_px, self._height_px = resolution
+        self._children = Observers()
 
     def __str__(self) -> str:
         title = "CANVAS\n"
         message = f"Width: {self.width}px\tHeight: {self.height}px\n"
         return title + message
 
-    def give_birth(self, function: Callable) -> None:
-        self._children.append(function)
+    @property
+    def root(self) -> Canvas:
+        """Top of the tree, what transactions are keyed by."""
+        return self
+
+    def give_birth(self, function: Callable) -> Callable[[], None]:
+        """Subscribes function to changes. Returns an unsubscribe handle."""
+        return self._children.subscribe(function)
 
     @property
     def width(self) -> int:
@@ -50,8 +301,7 @@ class Canvas:
     @resolution.setter
     def resolution(self, values: tuple[int, int]):
         self._width_px, self._height_px = values
-        for child in self._children:
-            child()
+        self._children.notify()
 
     @property
     def aspect_ratio(self) -> float:
@@ -60,7 +310,7 @@ class Canvas:
 class Margin:
     """Margin object. Values defined in pixels but returned normalized."""
 
-    _children: list[Callable] = []
+    _depth = 1
 
     def __init__(
         self,
@@ -71,6 +321,7 @@ class Margin:
     ) -> None:
 
         self.canvas = canvas
+        self._children = Observers()
 
         if all:
             tlbr = (all, all, all, all)
@@ -98,8 +349,13 @@ class Margin:
         message = f"Top: {self._top_px}px\tBottom: {self._right_px}px\tGutter: {self._gutter_px}px\nLeft: {self._left_px}px\tRight: {self._right_px}px\n"
         return title + message
 
-    def give_birth(self, function: Callable) -> None:
-        self._children.append(function)
+    @property
+    def root(self) -> Canvas:
+        return self.canvas
+
+    def give_birth(self, function: Callable) -> Callable[[], None]:
+        """Subscribes function to changes. Returns an unsubscribe handle."""
+        return self._children.subscribe(function)
 
     # THE COMPUTER ========================================
     def compute(self) -> None:
@@ -120,8 +376,7 @@ class Margin:
         self._widthlimit: int = cwidth
         self._heightlimit: int = cheight
 
-        for child in self._children:
-            child()
+        self._children.notify()
 
 
     # VALIDATION ========================================
@@ -167,7 +422,7 @@ class Margin:
     @top.setter
     def top(self, value: int) -> None:
         self._top_px = value
-        self.compute()
+        schedule(self.compute)
 
     @property
     def left(self) -> float:
@@ -177,7 +432,7 @@ class Margin:
     @left.setter
     def left(self, value: int) -> None:
         self._left_px = value
-        self.compute()
+        schedule(self.compute)
 
     @property
     def bottom(self) -> float:
@@ -187,7 +442,7 @@ class Margin:
     @bottom.setter
     def bottom(self, value: int) -> None:
         self._bottom_px = value
-        self.compute()
+        schedule(self.compute)
 
     @property
     def right(self) -> float:
@@ -197,7 +452,7 @@ class Margin:
     @right.setter
     def right(self, value: int) -> None:
         self._right_px = value
-        self.compute()
+        schedule(self.compute)
 
     @property
     def all(self) -> dict[str, float]:
@@ -213,7 +468,7 @@ class Margin:
     def all(self, value: int) -> None:
         """Sets all margins to the same pixel value"""
         self._top_px = self._left_px = self._bottom_px = self._right_px = value
-        self.compute()
+        schedule(self.compute)
 
     @property
     def tlbr(self) -> dict[str, float]:
@@ -223,7 +478,7 @@ class Margin:
     def tlbr(self, values: tuple[int, int, int, int]) -> None:
         """Set all margins at the same time, with different values (top, left, bottom, right)"""
         self._top_px, self._left_px, self._bottom_px, self._right_px = values
-        self.compute()
+        schedule(self.compute)
 
     @property
     def gutter(self) -> tuple[float, float]:
@@ -233,23 +488,36 @@ class Margin:
     @gutter.setter
     def gutter(self, value: int):
         self._gutter_px = value
-        self.compute()
+        schedule(self.compute)
 
     
 
 class Grid:
     """Grid object. Creates a layout of columns and rows and returns their dimensions in normalized values."""
 
+    _depth = 2
+
     def __init__(self, canvas: Canvas, margin: Margin, layout: tuple[int, int] = (12, 6)) -> None:
         self.canvas = canvas
         self.margin = margin
         self._cols, self._rows = layout
 
-        self._children: list[Callable] = None
+        self._children = Observers()
         self._matrix: list[list[int]] = None
+        self._matrix_key: tuple[int, int] = None
 
         self._screens: list[Screen] = None
         self._cells: list[GridCell] = None
+        self._cells_cols: int = None
+
+        # (col, row) -> screens covering that cell, in merge order. Rebuilt on demand
+        self._screen_index: dict[tuple[int, int], list[Screen]] = None
+        # taken cells, updated as screens move
+        self.occupancy = Occupancy(self)
+
+        # layout engine: per column / per row centers, shared by every GridCell
+        self._col_centers: array[float] = array("d")
+        self._row_centers: array[float] = array("d")
 
         self.compute()
         self.margin.give_birth(self.compute)
@@ -271,47 +539,199 @@ class Grid:
             1 - mg.top - mg.bottom - (self.rows - 1) * self.gutter[1]
         ) / self.rows
 
-        if self._matrix is None:
-            self._matrix = []
-        self._matrix.clear()
-        for row in range(self.rows):
-            x = row * self.cols + 1
-            matrix_row = [col + x for col in range(self.cols)]
-            self._matrix.append(matrix_row)
+        self.col_pitch = self.col_width + self.gutter[0]
+        self.row_pitch = self.row_height + self.gutter[1]
 
-        if self._children is None:
-            return
-        for child in self._children:
-            child()
+        # cell geometry is separable: cols + rows values describe all cols * rows cells
+        x0 = self.col_width / 2 + mg.left
+        y0 = self.row_height / 2 + mg.bottom
+        self._col_centers = array(
+            "d", [x0 + col * self.col_pitch for col in range(self.cols)]
+        )
+        self._row_centers = array(
+            "d", [y0 + row * self.row_pitch for row in range(self.rows)]
+        )
 
+        self._children.notify()
+
+
+    # LAYOUT ENGINE ========================================
+    def span_x(self, col: int, colspan: int) -> tuple[float, float]:
+        """Returns (center, width) of a span of columns, normalized."""
+        width = self.col_width * colspan + (colspan - 1) * self.gutter[0]
+        return width / 2 + self.margin.left + (col - 1) * self.col_pitch, width
+
+    def span_y(self, row: int, rowspan: int) -> tuple[float, float]:
+        """Returns (center, height) of a span of rows, normalized."""
+        height = self.row_height * rowspan + (rowspan - 1) * self.gutter[1]
+        return height / 2 + self.margin.bottom + (row - 1) * self.row_pitch, height
+
+    def index_to_coords(self, index: int) -> tuple[int, int]:
+        """Returns (col, row) of a 1-based cell index."""
+        row, col = divmod(index - 1, self._cols)
+        return col + 1, row + 1
+
+    def coords_to_index(self, col: int, row: int) -> int:
+        """Returns the 1-based cell index of (col, row)."""
+        return (row - 1) * self._cols + col
+
+    # HIT TESTING ========================================
+    def _hit(self, x: float, y: float) -> tuple[int, int, bool, bool]:
+        """Returns (col, row) under a normalized point and whether it falls in the
+        gutter right after that col / above that row."""
+        offset_x = x - self.margin.left
+        offset_y = y - self.margin.bottom
+        if offset_x < 0 or offset_y < 0:
+            return 0, 0, False, False
+
+        col, rest_x = divmod(offset_x, self.col_pitch)
+        row, rest_y = divmod(offset_y, self.row_pitch)
+        return int(col) + 1, int(row) + 1, rest_x > self.col_width, rest_y > self.row_height
+
+    def cell_at(self, x: float, y: float) -> int | None:
+        """Index of the cell under a normalized point, None over margins and gutters."""
+        col, row, in_gutter_x, in_gutter_y = self._hit(x, y)
+        if in_gutter_x or in_gutter_y:
+            return None
+        if not (1 <= col <= self.cols and 1 <= row <= self.rows):
+            return None
+        return self.coords_to_index(col, row)
+
+    def screen_at(self, x: float, y: float) -> Screen | None:
+        """Topmost screen under a normalized point, gutters inside a screen included."""
+        col, row, in_gutter_x, in_gutter_y = self._hit(x, y)
+
+        for screen in reversed(self.screen_index.get((col, row), ())):
+            if in_gutter_x and screen._col + screen._colspan - 1 == col:
+                continue
+            if in_gutter_y and screen._row + screen._rowspan - 1 == row:
+                continue
+            return screen
+        return None
+
+    @property
+    def screen_index(self) -> dict[tuple[int, int], list[Screen]]:
+        """Maps (col, row) to the screens covering it, in merge order."""
+        if self._screen_index is None:
+            index = {}
+            for screen in self._screens or ():
+                for col in range(screen._col, screen._col + screen._colspan):
+                    for row in range(screen._row, screen._row + screen._rowspan):
+                        index.setdefault((col, row), []).append(screen)
+            self._screen_index = index
+        return self._screen_index
+
+    # OCCLUSION ========================================
+    def occlusion(self) -> tuple[list[bool], int]:
+        """Returns whether each screen, in merge order, shows at all from under the
+        screens merged after it, and how many hidden ones are duplicates (see
+        duplicates). Gutters are tracked too, so two neighbours don't hide a screen
+        spanning the gutter between them."""
+        screens = self._screens or []
+        visible = [False] * len(screens)
+
+        # one int per cell row and per gutter row, one bit per cell and per gutter
+        covered: dict[int, int] = {}
+        for i in range(len(screens) - 1, -1, -1):
+            screen = screens[i]
+            bits = ((1 << 2 * screen._colspan - 1) - 1) << 2 * (screen._col - 1)
+            first_row = 2 * (screen._row - 1)
+            for row in range(first_row, first_row + 2 * screen._rowspan - 1):
+                coverage = covered.get(row, 0)
+                if bits & ~coverage:
+                    visible[i] = True
+                    covered[row] = coverage | bits
+
+        return visible, self.duplicates().count(True)
+
+    def duplicates(self) -> list[bool]:
+        """Returns whether each screen, in merge order, exactly coincides with a screen
+        merged after it. Those never show, exports keep the last screen of each run."""
+        screens = self._screens or []
+        duplicate = [False] * len(screens)
+        seen = set()
+        for i in range(len(screens) - 1, -1, -1):
+            screen = screens[i]
+            rect = (screen._col, screen._row, screen._colspan, screen._rowspan)
+            duplicate[i] = rect in seen
+            seen.add(rect)
+        return duplicate
+
+    @property
+    def col_centers(self) -> array[float]:
+        """Normalized x center of every column."""
+        return self._col_centers
+
+    @property
+    def row_centers(self) -> array[float]:
+        """Normalized y center of every row."""
+        return self._row_centers
 
     # OBSERVER METHODS ========================================
-    def give_birth(self, function: Callable) -> None:
-        if self._children is None:
-            self._children = []
-        self._children.append(function)
+    def batch(self) -> Transaction:
+        """Use as `with grid.batch():` to recompute canvas, margin, grid and screens only once."""
+        return Transaction(self.canvas)
+
+    @property
+    def root(self) -> Canvas:
+        return self.canvas
+
+    def give_birth(self, function: Callable) -> Callable[[], None]:
+        """Subscribes function to changes. Returns an unsubscribe handle."""
+        return self._children.subscribe(function)
 
     def append_screen(self, screen: Screen) -> None:
         if self._screens is None:
             self._screens = []
         self._screens.append(screen)
+        self._screen_index = None
+
+    def reorder_screen(self, screen: Screen, index: int) -> None:
+        """Moves screen to index in merge order."""
+        self._screens.remove(screen)
+        self._screens.insert(index, screen)
+        self._screen_index = None
 
     def append_cell(self, cell: GridCell) -> None:
         if self._cells is None:
             self._cells = []
         self._cells.append(cell)
 
+    def sync_cells(self) -> list[GridCell]:
+        """Resizes the GridCell pool in place so there is exactly one cell per grid cell.
+        Existing cells are reused, extra ones are dropped."""
+        if self._cells is None:
+            self._cells = []
+        cells = self._cells
+        amount = self.cols * self.rows
+
+        del cells[amount:]
+        if self._cells_cols != self.cols:
+            for cell in cells:
+                cell._col, cell._row = self.index_to_coords(cell.index)
+            self._cells_cols = self.cols
+
+        for index in range(len(cells) + 1, amount + 1):
+            GridCell(self, index)
+        return cells
+
+    @property
+    def callbacks_per_compute(self) -> int:
+        """How many children the last compute called. Should match the amount of screens."""
+        return self._children.notified
+
 
     # TRANSFORM METHODS ========================================
     def _rotate_grid(self) -> None:
-        self.canvas.resolution = self.canvas.height, self.canvas.width
-        self.margin.tlbr = (
-            self.margin._right_px,
-            self.margin._top_px,
-            self.margin._left_px,
-            self.margin._bottom_px,
-        )
-        self.composition = self.rows, self.cols
+        with self.batch():
+            self.canvas.resolution = self.canvas.height, self.canvas.width
+            self.margin.tlbr = (
+                self.margin._right_px,
+                self.margin._top_px,
+                self.margin._left_px,
+                self.margin._bottom_px,
+            )
+            self.composition = self.rows, self.cols
 
     def rotate_clockwise(self) -> None:  
         self._rotate_grid()
@@ -345,7 +765,7 @@ class Grid:
     @cols.setter
     def cols(self, value: int):
         self._cols = value
-        self.compute()
+        schedule(self.compute)
 
     @property
     def rows(self) -> int:
@@ -355,7 +775,7 @@ class Grid:
     @rows.setter
     def rows(self, value: int):
         self._rows = value
-        self.compute()
+        schedule(self.compute)
 
     @property
     def gutter(self) -> tuple[float, float]:
@@ -374,10 +794,17 @@ class Grid:
     @composition.setter
     def composition(self, value: tuple[int, int]) -> None:
         self._cols, self._rows = value
-        self.compute()
+        schedule(self.compute)
 
     @property
-    def matrix(self) -> list:
+    def matrix(self) -> list[list[int]]:
+        """Cell indexes laid out in rows. Built on demand and cached per composition."""
+        if self._matrix_key != self.composition:
+            self._matrix = [
+                list(range(row * self.cols + 1, (row + 1) * self.cols + 1))
+                for row in range(self.rows)
+            ]
+            self._matrix_key = self.composition
         return self._matrix
 
 
@@ -393,10 +820,35 @@ class Grid:
 class Screen:
     """Screen object class. Its dimensions and position are defined in columns and rows and returned in normalized values."""
 
+    _depth = 3
+
+    # a fixed attribute set, so a misspelled one raises; the memory it saves is
+    # small next to the values dict each compute builds (see bench_screen_memory)
+    __slots__ = (
+        "grid",
+        "_colspan",
+        "_rowspan",
+        "_col",
+        "_row",
+        "_name",
+        "_unsubscribe",
+        "_corners",
+        "_expanded_corners",
+        "width",
+        "height",
+        "x",
+        "y",
+        "size",
+        "values",
+        "id",
+        "__weakref__",
+    )
+
     def __init__(
         self, grid: Grid, colspan: int, rowspan: int, col: int, row: int
     ) -> Screen:
         self.grid = grid
+        self.values: dict[str, float] = {}
 
         self._colspan = colspan
         self._rowspan = rowspan
@@ -405,24 +857,33 @@ class Screen:
         self._row = row
 
         self.compute()
-        self.grid.give_birth(self.compute)
+        self._unsubscribe = self.grid.give_birth(self.compute)
         self.grid.append_screen(self)
 
     def __str__(self) -> str:
         message = f"Colspan: {self.colspan}\tRowspan: {self.rowspan}\nCol: {self.col}\tRow: {self.row}\n"
         return message
 
+    @property
+    def root(self) -> Canvas:
+        return self.grid.canvas
+
     def delete(self) -> None:
+        # a compute pending since an edit in the same batch would place it again
+        transaction = Transaction.open.get(self.root)
+        if transaction is not None:
+            transaction.discard(self.compute)
+        self._unsubscribe()
         if self not in self.grid.screens:
             return
         self.grid.screens.remove(self)
+        self.grid._screen_index = None
+        self.grid.occupancy.remove(self)
 
     @classmethod
     def create_from_coords(cls: Screen, grid: Grid, point1: int, point2: int) -> Screen:
-        matrix = grid.matrix
-
-        p1 = get_coords(point1, matrix)
-        p2 = get_coords(point2, matrix)
+        p1 = grid.index_to_coords(point1)
+        p2 = grid.index_to_coords(point2)
 
         colspan = abs(p1[0] - p2[0]) + 1
         rowspan = abs(p1[1] - p2[1]) + 1
@@ -461,7 +922,7 @@ class Screen:
     @colspan.setter
     def colspan(self, value: int) -> None:
         self._colspan = value
-        self.compute()
+        schedule(self.compute)
 
     @property
     def rowspan(self) -> int:
@@ -470,7 +931,7 @@ class Screen:
     @rowspan.setter
     def rowspan(self, value: int) -> None:
         self._rowspan = value
-        self.compute()
+        schedule(self.compute)
 
     @property
     def col(self) -> int:
@@ -479,7 +940,7 @@ class Screen:
     @col.setter
     def col(self, value: int) -> None:
         self._col = value
-        self.compute()
+        schedule(self.compute)
 
     @property
     def row(self) -> int:
@@ -488,7 +949,7 @@ class Screen:
     @row.setter
     def row(self, value: int) -> None:
         self._row = value
-        self.compute()
+        schedule(self.compute)
 
     @property
     def name(self) -> str:
@@ -503,6 +964,19 @@ class Screen:
 
     @property
     def corners(self) -> dict[tuple]:
+        """Cached until the next compute."""
+        if self._corners is None:
+            self._corners = self._compute_corners()
+        return self._corners
+
+    @property
+    def expanded_corners(self) -> dict[tuple]:
+        """Cached until the next compute."""
+        if self._expanded_corners is None:
+            self._expanded_corners = self._compute_expanded_corners()
+        return self._expanded_corners
+
+    def _compute_corners(self) -> dict[tuple]:
         top_left = (self.x - self.width/2, self.y + self.height/2) 
         top_right = (self.x + self.width/2, self.y + self.height/2)
         bottom_left = (self.x - self.width/2, self.y - self.height/2) 
@@ -516,8 +990,7 @@ class Screen:
         }
         return corners
 
-    @property
-    def expanded_corners(self) -> dict[tuple]:
+    def _compute_expanded_corners(self) -> dict[tuple]:
         half_gutter = tuple(g/2 for g in self.grid.gutter)
         extra_width, extra_height = half_gutter
 
@@ -543,30 +1016,18 @@ class Screen:
         self._rowspan = rowspan
         self._col = col
         self._row = row
-        self.compute()
+        schedule(self.compute)
 
     def compute(self) -> None:
         """Normalizes pixel values."""
 
         grid = self.grid
-        margin = grid.margin
 
-        width = grid.col_width * self._colspan + (self._colspan - 1) * grid.gutter[0]
-        height = grid.row_height * self._rowspan + (self._rowspan - 1) * grid.gutter[1]
+        x, width = grid.span_x(self._col, self._colspan)
+        y, height = grid.span_y(self._row, self._rowspan)
 
         size = max(width, height)
 
-        x = (
-            width / 2
-            + margin.left
-            + (self._col - 1) * (grid.col_width + grid.gutter[0])
-        )
-        y = (
-            height / 2
-            + margin.bottom
-            + (self._row - 1) * (grid.row_height + grid.gutter[1])
-        )
-
         # the "setters"
         self.width = width
         self.height = height
@@ -574,6 +1035,8 @@ class Screen:
         self.y = y
         self.size = size
 
+        # a new dict every compute: callers (the export thread, delta snapshots)
+        # keep the ones they got
         self.values = {
             "Width": width,
             "Height": height,
@@ -582,64 +1045,63 @@ class Screen:
             "Size": size,
         }
 
+        self._corners = self._expanded_corners = None
+        grid._screen_index = None
+        grid.occupancy.place(self)
+
     def get_values(self) -> dict[str, int]:
         return self.values
 
 class GridCell(Screen):
     """Grid Cells are Screens of 1 col width x 1 row height that compose a grid."""
 
-    grid: Grid = None
     all_blocks = None
 
+    __slots__ = ("index",)
+
     def __init__(self, grid: Grid, index: int = None):
 
-        if GridCell.grid is None:
-            GridCell.grid = grid
+        self.grid = grid
 
         self._colspan = self._rowspan = 1
 
         if index is None:
             self._col = self._row = 1
         else:
-            self._col, self._row = get_coords(index, GridCell.grid.matrix)
+            self._col, self._row = grid.index_to_coords(index)
         self.index = index
-        
-        self.compute()
-        self.grid.give_birth(self.compute)
+
+        # geometry is read straight from the grid layout, no need to subscribe
         self.grid.append_cell(self)
 
     @classmethod
     def generate_all(cls, grid: Grid) -> list[GridCell]:
-        if cls.all_blocks is None:
-            cls.all_blocks = []
-        else:
-            cls.all_blocks.clear()
-        
-        for row in grid.matrix:
-            for index in row:
-                cls.all_blocks.append(GridCell(grid, index))
+        """Returns the grid's pooled cells, resized to the current composition."""
+        cls.all_blocks = grid.sync_cells()
         return cls.all_blocks
 
-    def compute(self):
-        grid = GridCell.grid
-        margin = grid.margin
+    def compute(self) -> None:
+        """Nothing to compute: x, y, width and height are views into the Grid layout."""
 
-        x = (
-            grid.col_width / 2
-            + margin.left
-            + (self._col - 1) * (grid.col_width + grid.gutter[0])
-        )
-        y = (
-            grid.row_height / 2
-            + margin.bottom
-            + (self._row - 1) * (grid.row_height + grid.gutter[1])
-        )
-        # y = 1-y
+    # cells are never computed, so their corners can't be cached
+    corners = property(Screen._compute_corners)
+    expanded_corners = property(Screen._compute_expanded_corners)
 
-        self.width = grid.col_width
-        self.height = grid.row_height
-        self.x = x
-        self.y = y
+    @property
+    def x(self) -> float:
+        return self.grid.col_centers[self._col - 1]
+
+    @property
+    def y(self) -> float:
+        return self.grid.row_centers[self._row - 1]
+
+    @property
+    def width(self) -> float:
+        return self.grid.col_width
+
+    @property
+    def height(self) -> float:
+        return self.grid.row_height
 
 
 # Exceptions (not yet implemented)
@@ -1,7 +1,29 @@
-import pickle
+from __future__ import annotations
+from collections.abc import Callable, Iterable, Iterator
+from functools import lru_cache
+from io import TextIOBase
 import json
+import math
 import os
-import pysion
+
+
+class DeferredModule:
+    """Stands in for a module until one of its attributes is first needed, then
+    imports it and takes its place in the importing module's globals."""
+
+    def __init__(self, name: str, namespace: dict) -> None:
+        self._name = name
+        self._namespace = namespace
+
+    def __getattr__(self, attribute: str):
+        module = __import__(self._name)
+        self._namespace[self._name] = module
+        return getattr(module, attribute)
+
+
+# pysion only loads once something is rendered, so load_defaults and the batch
+# workers' layout math don't pay for it
+pysion = DeferredModule("pysion", globals())
 
 
 # Specifically SplitScreener Functions
@@ -77,19 +99,368 @@ def create_media_out(position: tuple[int, int], last_tool_name: str) -> str:
     )
 
 
-def render_fusion_output(
-    screen_values: list[dict[str, int]],
+# Crop compositing: no full canvas RectangleMask per screen
+COMPOSITING = ("mask", "crop")
+
+
+def crop_rectangle(
+    resolution: tuple[int, int], width: float, height: float, size: float
+) -> tuple[int, int, int, int]:
+    """Returns the pixel (XOffset, YOffset, XSize, YSize) of the footage a screen shows.
+    Merged at Size, the centered crop covers what the RectangleMask would let through:
+    fractional sizes round up, and an odd pixel left over goes after the crop."""
+    x_size = min(_ceil_pixels(resolution[0] * width / size), resolution[0])
+    y_size = min(_ceil_pixels(resolution[1] * height / size), resolution[1])
+    return (resolution[0] - x_size) // 2, (resolution[1] - y_size) // 2, x_size, y_size
+
+
+def _ceil_pixels(pixels: float) -> int:
+    # float noise like 960.0000000001 isn't a pixel more of footage
+    return math.ceil(round(pixels, 6))
+
+
+def create_cropped_screen(
+    last_tool_name: str,
+    resolution: tuple[int, int],
+    index: int = 0,
+    fusion_studio: bool = False,
+    **inputs,
+) -> str:
+    """Same picture as create_screen, from a Crop merged without an EffectMask."""
+
+    x_offset, y_offset, x_size, y_size = crop_rectangle(
+        resolution, inputs["Width"], inputs["Height"], inputs["Size"]
+    )
+
+    # Fusion Studio doesn't support MediaIns, the Crop is left for a Loader
+    media_in = ""
+    media_in_as_input_to_crop = ""
+    if not fusion_studio:
+        media_in = pysion.add_tool(
+            "MediaIn",
+            f"SSScreen{index+1}",
+            pysion.add_inputs(Layer=f'"{index}"'),
+            (-2, index),
+        )
+        media_in_as_input_to_crop = pysion.add_source_input(
+            "Input", f"SSScreen{index+1}", "Output"
+        )
+
+    crop = pysion.add_tool(
+        "Crop",
+        f"SSCrop{index+1}",
+        pysion.add_inputs(
+            XOffset=x_offset, YOffset=y_offset, XSize=x_size, YSize=y_size
+        )
+        + media_in_as_input_to_crop,
+        (-1, index),
+    )
+
+    merge = pysion.add_tool(
+        "Merge",
+        f"SSMerge{index+1}",
+        pysion.add_inputs(
+            Center=f"{{ {inputs['CenterX']}, {inputs['CenterY']} }}",
+            Size=inputs["Size"],
+        )
+        + pysion.add_source_input("Background", last_tool_name, "Output")
+        + pysion.add_source_input("Foreground", f"SSCrop{index+1}", "Output"),
+        (0, index),
+    )
+
+    return merge + media_in + crop
+
+
+# Compact output
+COMPACT_DECIMALS = 6  # at most 0.004 px off on an 8K canvas
+
+def round_values(screen: dict[str, float], decimals: int) -> dict[str, float]:
+    """Copy of screen values rounded to decimals. Python prints the shortest repr
+    of a float, so 0.13541666666666669 comes out as 0.135417 and 0.5 stays 0.5."""
+    return {key: round(value, decimals) for key, value in screen.items()}
+
+
+def minify(text: str) -> str:
+    """Drops pysion's indentation and the spaces it puts around = , { and }.
+    Quoted strings are kept as they are. str.replace is several times faster than a regex
+    here."""
+    parts = text.split('"')
+    parts[::2] = [
+        part.replace("\t", "")
+        .replace("\n", "")
+        .replace(" = ", "=")
+        .replace(" {", "{")
+        .replace("{ ", "{")
+        .replace(" }", "}")
+        .replace(", ", ",")
+        for part in parts[::2]
+    ]
+    return '"'.join(parts)
+
+
+# Merge topologies
+TOPOLOGIES = ("chain", "tree")
+
+
+def create_transparent_canvas(resolution: tuple[int, int]) -> str:
+    """What the screens of a merge tree are masked onto, instead of SSCanvas."""
+    return pysion.add_tool(
+        "Background",
+        "SSTransparent",
+        pysion.add_inputs(Width=resolution[0], Height=resolution[1], TopLeftAlpha=0),
+        (-1, -1),
+    )
+
+
+def create_merge(
+    name: str, background: str, foreground: str, position: tuple[int, int]
+) -> str:
+    return pysion.add_tool(
+        "Merge",
+        name,
+        pysion.add_source_input("Background", background, "Output")
+        + pysion.add_source_input("Foreground", foreground, "Output"),
+        position,
+    )
+
+
+class MergeTree:
+    """Merges its inputs pairwise as they are pushed, like carrying in a binary
+    counter, so the tree stays balanced without knowing the amount of screens up front.
+    Inputs pushed later end up on top. n inputs are at most ceil(log2(n)) + 1 deep."""
+
+    def __init__(self) -> None:
+        self._stack: list[tuple[str, int, int, int]] = []  # name, inputs, level, y
+        self.merges = 0
+        self.depth = 0
+
+    def push(self, name: str, level: int, y: int) -> list[str]:
+        """Adds a tool, returns the merges it completed.
+        level is the amount of Merges the tool already sits on."""
+        stack = self._stack
+        stack.append((name, 1, level, y))
+        self.depth = max(self.depth, level)
+
+        tools = []
+        while len(stack) > 1 and stack[-1][1] == stack[-2][1]:
+            tools.append(self._combine())
+        return tools
+
+    def close(self) -> tuple[list[str], str]:
+        """Merges whatever is left, returns those merges and the name of the root."""
+        tools = []
+        while len(self._stack) > 1:
+            tools.append(self._combine())
+        return tools, self._stack[0][0]
+
+    def _combine(self) -> str:
+        fg_name, fg_inputs, fg_level, fg_y = self._stack.pop()
+        bg_name, bg_inputs, bg_level, bg_y = self._stack.pop()
+
+        self.merges += 1
+        name = f"SSTree{self.merges}"
+        level = max(bg_level, fg_level) + 1
+        y = (bg_y + fg_y) // 2
+        self.depth = max(self.depth, level)
+
+        self._stack.append((name, bg_inputs + fg_inputs, level, y))
+        return create_merge(name, bg_name, fg_name, (level, y))
+
+
+def nodes_per_screen(fusion_studio: bool = False, topology: str = "chain") -> int:
+    """How many tools one screen adds to the node tree, whatever the compositing."""
+    nodes = 3  # Merge, MediaIn and RectangleMask or Crop
+    if fusion_studio:
+        nodes -= 1
+    if topology == "tree":
+        nodes += 1  # its share of the merge tree
+    return nodes
+
+
+# Precompiled templates (fast path)
+class Slot:
+    """Stands in for a value while compiling a template.
+    Integer arithmetic (index + 1, position * spacing) is recorded as scale and offset."""
+
+    def __init__(self, name: str, scale: int = 1, offset: int = 0) -> None:
+        self.name = name
+        self.scale = scale
+        self.offset = offset
+
+    def __str__(self) -> str:
+        return f"\0{self.name}*{self.scale}+{self.offset}\0"
+
+    def __format__(self, spec: str) -> str:
+        return str(self)
+
+    def __add__(self, other: int) -> Slot:
+        return Slot(self.name, self.scale, self.offset + other)
+
+    def __mul__(self, other: int) -> Slot:
+        return Slot(self.name, self.scale * other, self.offset * other)
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+
+class ToolTemplate:
+    """pysion output with every variable part turned into a slot, filled by name."""
+
+    def __init__(self, text: str) -> None:
+        parts = text.split("\0")
+        self.literals = parts[0::2]
+        self.slots = []
+        for slot in parts[1::2]:
+            name, _, linear = slot.partition("*")
+            scale, _, offset = linear.partition("+")
+            self.slots.append((name, int(scale), int(offset)))
+
+    def fill(self, **values) -> str:
+        literals = self.literals
+        chunks = [literals[0]]
+        for i, (name, scale, offset) in enumerate(self.slots, 1):
+            value = values[name]
+            if scale != 1 or offset:
+                value = value * scale + offset
+            chunks.append(str(value))
+            chunks.append(literals[i])
+        return "".join(chunks)
+
+
+SCREEN_INPUTS = ("Width", "Height", "CenterX", "CenterY", "Size")
+
+
+@lru_cache(maxsize=None)
+def screen_template(fusion_studio: bool = False) -> ToolTemplate:
+    """Compiles create_screen once. tests/test_export_template.py checks it against
+    pysion's output byte for byte."""
+
+    return ToolTemplate(
+        create_screen(
+            Slot("last_tool_name"),
+            (Slot("width"), Slot("height")),
+            Slot("index"),
+            fusion_studio,
+            **{name: Slot(name) for name in SCREEN_INPUTS},
+        )
+    )
+
+
+def create_screen_from_template(
+    last_tool_name: str,
     resolution: tuple[int, int],
+    index: int = 0,
     fusion_studio: bool = False,
+    **inputs,
 ) -> str:
+    """Same output as create_screen, filled into a precompiled template."""
+
+    return screen_template(fusion_studio).fill(
+        last_tool_name=last_tool_name,
+        width=resolution[0],
+        height=resolution[1],
+        index=index,
+        **inputs,
+    )
+
 
-    fusion_canvas = create_canvas(resolution)
+SCREEN_BACKENDS = {
+    "pysion": create_screen,
+    "template": create_screen_from_template,
+}
+
+
+def screen_backend(backend: str = "pysion", compositing: str = "mask") -> Callable:
+    """Returns the function that emits one screen's node group."""
+    if compositing not in COMPOSITING:
+        raise ValueError(
+            f"Unknown compositing {compositing!r}, expected {COMPOSITING}."
+        )
+    if compositing == "crop":
+        return create_cropped_screen  # crops are computed, there's no template for them
+    return SCREEN_BACKENDS[backend]
+
+
+@lru_cache(maxsize=None)
+def fusion_wrapper() -> tuple[str, str]:
+    """Returns what pysion.wrap_for_fusion puts before and after the tools,
+    so the tools themselves can be streamed."""
+    placeholder = "\0SSTOOLS\0"
+    head, tail = pysion.wrap_for_fusion(placeholder).split(placeholder)
+    return head, tail
+
+
+def iter_fusion_output(
+    screen_values: Iterable[dict[str, float]],
+    resolution: tuple[int, int],
+    fusion_studio: bool = False,
+    backend: str | Callable[..., str] = "pysion",
+    topology: str = "chain",
+    compositing: str = "mask",
+    compact: int = None,
+) -> Iterator[str]:
+    """Yields the node tree one node group at a time, so only one screen is held in memory.
+    backend is a key of SCREEN_BACKENDS, or a function with create_screen's signature.
+    topology "chain" merges every screen onto the previous one, "tree" masks each screen
+    onto a transparent background and merges those in a balanced binary tree, so the
+    longest Merge chain is about log2 of the amount of screens instead of all of them.
+    compositing "crop" replaces each screen's full canvas RectangleMask with a Crop.
+    It's ignored when backend is a function.
+    compact rounds every value to that many decimals and drops pysion's whitespace,
+    COMPACT_DECIMALS stays well under a pixel on 8K canvases. It trades render time
+    for size: rendering takes about twice as long.
+    None in screen_values skips that screen (see Grid.occlusion and
+    Grid.duplicates)."""
+
+    chunks = _iter_fusion_tools(
+        screen_values,
+        resolution,
+        fusion_studio,
+        backend,
+        topology,
+        compositing,
+        compact,
+    )
+    if compact is None:
+        return chunks
+    return map(minify, chunks)
+
+
+def _iter_fusion_tools(
+    screen_values: Iterable[dict[str, float]],
+    resolution: tuple[int, int],
+    fusion_studio: bool,
+    backend: str | Callable[..., str],
+    topology: str,
+    compositing: str,
+    compact: int | None,
+) -> Iterator[str]:
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown topology {topology!r}, expected {TOPOLOGIES}.")
+    create = backend
+    if isinstance(backend, str):
+        create = screen_backend(backend, compositing)
+
+    head, tail = fusion_wrapper()
+    yield head
+    yield create_canvas(resolution)
 
-    fusion_screens = ""
     last_tool_name = "SSCanvas"
+    tree = None
+
     i = 0
     for screen in screen_values:
-        fusion_screen = create_screen(
+        if screen is None:  # culled, later screens keep their MediaIn layer
+            i += 1
+            continue
+        if topology == "tree" and tree is None:  # only if a screen is exported
+            yield create_transparent_canvas(resolution)
+            tree = MergeTree()
+            tree.push("SSCanvas", 0, -1)
+            last_tool_name = "SSTransparent"
+        if compact is not None:
+            screen = round_values(screen, compact)
+        yield create(
             last_tool_name,
             resolution,
             i,
@@ -101,22 +472,148 @@ def render_fusion_output(
             Size=screen["Size"],
         )
         i += 1
-        last_tool_name = f"SSMerge{i}"
-        fusion_screens += fusion_screen
+        if tree is None:
+            last_tool_name = f"SSMerge{i}"
+        else:
+            yield from tree.push(f"SSMerge{i}", 1, i - 1)
+
+    if tree is not None:
+        merges, last_tool_name = tree.close()
+        yield from merges
 
-    fusion_media_out = ""
     if not fusion_studio:
-        fusion_media_out = create_media_out((0, len(screen_values)), last_tool_name)
+        yield create_media_out((0, i), last_tool_name)
+    yield tail
+
+
+def write_fusion_output(
+    file: TextIOBase,
+    screen_values: Iterable[dict[str, float]],
+    resolution: tuple[int, int],
+    fusion_studio: bool = False,
+    backend: str = "pysion",
+    topology: str = "chain",
+    compositing: str = "mask",
+    compact: int = None,
+) -> None:
+    """Streams the node tree into a text file object. For sockets, use socket.makefile("w")."""
+    for chunk in iter_fusion_output(
+        screen_values,
+        resolution,
+        fusion_studio,
+        backend,
+        topology,
+        compositing,
+        compact,
+    ):
+        file.write(chunk)
+
 
-    fusion_output = pysion.wrap_for_fusion(
-        fusion_canvas + fusion_screens + fusion_media_out
+def render_fusion_output(
+    screen_values: Iterable[dict[str, float]],
+    resolution: tuple[int, int],
+    fusion_studio: bool = False,
+    backend: str = "pysion",
+    topology: str = "chain",
+    compositing: str = "mask",
+    compact: int = None,
+) -> str:
+    return "".join(
+        iter_fusion_output(
+            screen_values,
+            resolution,
+            fusion_studio,
+            backend,
+            topology,
+            compositing,
+            compact,
+        )
     )
 
-    return fusion_output
+
+def render_fusion_delta(
+    previous_values: list[dict[str, float]] | None,
+    screen_values: list[dict[str, float]],
+    resolution: tuple[int, int] = None,
+    compositing: str = "mask",
+    compact: int = None,
+) -> str | None:
+    """Settings that only carry the Merge and RectangleMask (or Crop) inputs that
+    changed since previous_values, for the same screens in the same order.
+    None if nothing changed. Crops are in pixels, so "crop" compositing needs the
+    resolution. With compact, changes smaller than its decimals don't count."""
+
+    if previous_values is None:
+        raise ValueError("Delta export needs a previous export.")
+    if len(previous_values) != len(screen_values):
+        raise ValueError("Delta export needs the same screens as the last export.")
+    if compositing == "crop" and resolution is None:
+        raise ValueError("Delta export of crops needs the resolution.")
+
+    tools = []
+    for i, (old, new) in enumerate(zip(previous_values, screen_values)):
+        if old is None and new is None:
+            continue
+        if old is None or new is None:
+            raise ValueError("Delta export needs the same screens as the last export.")
+        if compact is not None:
+            old = round_values(old, compact)
+            new = round_values(new, compact)
+        merge_inputs = {}
+        mask_inputs = {}
+
+        if old["Center.X"] != new["Center.X"] or old["Center.Y"] != new["Center.Y"]:
+            center = f"{{ {new['Center.X']}, {new['Center.Y']} }}"
+            merge_inputs["Center"] = mask_inputs["Center"] = center
+        if old["Size"] != new["Size"]:
+            merge_inputs["Size"] = new["Size"]
+        if old["Width"] != new["Width"]:
+            mask_inputs["Width"] = new["Width"]
+        if old["Height"] != new["Height"]:
+            mask_inputs["Height"] = new["Height"]
+
+        if merge_inputs:
+            tools.append(
+                pysion.add_tool(
+                    "Merge", f"SSMerge{i+1}", pysion.add_inputs(**merge_inputs), (0, i)
+                )
+            )
+
+        if compositing == "crop":
+            keys = ("Width", "Height", "Size")
+            crop = crop_rectangle(resolution, *(new[key] for key in keys))
+            if crop != crop_rectangle(resolution, *(old[key] for key in keys)):
+                tools.append(
+                    pysion.add_tool(
+                        "Crop",
+                        f"SSCrop{i+1}",
+                        pysion.add_inputs(
+                            **dict(zip(("XOffset", "YOffset", "XSize", "YSize"), crop))
+                        ),
+                        (-1, i),
+                    )
+                )
+        elif mask_inputs:
+            tools.append(
+                pysion.add_tool(
+                    "RectangleMask",
+                    f"SSMask{i+1}",
+                    pysion.add_inputs(**mask_inputs),
+                    (1, i),
+                )
+            )
+
+    if not tools:
+        return None
+    head, tail = fusion_wrapper()
+    output = head + "".join(tools) + tail
+    return output if compact is None else minify(output)
 
 
 # defaults and presets
 def load_defaults_pickle(defaults_directory: str) -> tuple[dict, str, int]:
+    import pickle
+
     defaults_files = os.listdir(defaults_directory)
     defaults_files.sort()
 
@@ -168,13 +665,36 @@ def save_preset_for_splitscreener(
     presets_directory: str | os.PathLike,
     splitscreener_values: dict[dict[str, int]],
     preset_name: str = "",
-) -> None:
+) -> str:
+    """Saves a layout spec (canvas, margin, grid and screens, like defaults.json) as
+    <preset_name>.json, numbered if the name is taken. Returns the path."""
 
     if not preset_name:
+        preset_name = "SplitScreenerPreset"
         if "screens" in splitscreener_values:
-            screen_amt = splitscreener_values["screens"]
-            preset_name += f"_{len(screen_amt)}Screen{'s' if screen_amt > 1 else ''}"
-    ...
+            screen_amt = len(splitscreener_values["screens"])
+            preset_name += f"_{screen_amt}Screen{'s' if screen_amt > 1 else ''}"
+
+    preset_file_name = f"{preset_name}.json"
+    i = 0
+    while os.path.exists(os.path.join(presets_directory, preset_file_name)):
+        i += 1
+        preset_file_name = f"{preset_name}_{i}.json"
+
+    path = os.path.join(presets_directory, preset_file_name)
+    write_atomic(path, json.dumps(splitscreener_values, indent=4))
+    return path
+
+
+def write_atomic(path: str | os.PathLike, text: str) -> None:
+    """Writes text next to path, then moves it in place with os.replace. Readers,
+    and whatever survives a crash, see either the old file or the new one."""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
 
 
 # testing area
@@ -0,0 +1,300 @@
+"""
+Undo and redo for SplitScreener layouts.
+
+Every step of the history is a Layout: immutable canvas, margin, grid and screen
+records. Steps share whatever didn't change with the step before, so recording one
+costs memory and time in proportion to the screens that moved, not to the whole wall.
+
+The screen records live in a ScreenRecords, a persistent vector split in chunks of
+at most 2 * CHUNK records. Changing a screen copies its chunk and the (short) tuple of
+chunks, every other chunk is shared. Diffing two steps only looks inside the chunks
+they don't share.
+"""
+
+from __future__ import annotations
+from collections import deque, namedtuple
+from collections.abc import Iterator
+import ss_classes as ss
+
+CanvasRecord = namedtuple("CanvasRecord", "width height")
+MarginRecord = namedtuple("MarginRecord", "top left bottom right gutter")
+GridRecord = namedtuple("GridRecord", "cols rows")
+# key orders screens like the grid merges them: new screens get the highest one
+ScreenRecord = namedtuple("ScreenRecord", "key colspan rowspan col row")
+Layout = namedtuple("Layout", "canvas margin grid screens")
+
+# what an undo or redo did to the live model, for redrawing only that
+Changes = namedtuple("Changes", "removed added edited layout")
+
+CHUNK = 32
+
+
+# PERSISTENT VECTOR ========================================
+class ScreenRecords:
+    """Immutable ScreenRecords sorted by key. Updates return a new ScreenRecords that
+    shares every chunk but the one they touched."""
+
+    __slots__ = ("chunks", "firsts", "length")
+
+    def __init__(
+        self,
+        chunks: tuple[tuple[ScreenRecord, ...], ...] = (),
+        length: int = 0,
+    ) -> None:
+        self.chunks = chunks
+        self.firsts = tuple(chunk[0].key for chunk in chunks)  # for binary search
+        self.length = length
+
+    @classmethod
+    def from_records(cls, records: list[ScreenRecord]) -> ScreenRecords:
+        """Expects records sorted by key."""
+        chunks = tuple(
+            tuple(records[i : i + CHUNK]) for i in range(0, len(records), CHUNK)
+        )
+        return cls(chunks, len(records))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[ScreenRecord]:
+        for chunk in self.chunks:
+            yield from chunk
+
+    def _chunk_of(self, key: int) -> int:
+        """Index of the chunk key is in, or would go in."""
+        firsts = self.firsts
+        low, high = 0, len(firsts)
+        while low < high:
+            middle = (low + high) // 2
+            if firsts[middle] <= key:
+                low = middle + 1
+            else:
+                high = middle
+        return max(low - 1, 0)
+
+    def _replace_chunk(
+        self, index: int, chunk: tuple[ScreenRecord, ...], length: int
+    ) -> ScreenRecords:
+        if len(chunk) > 2 * CHUNK:
+            replacement = (chunk[:CHUNK], chunk[CHUNK:])
+        elif chunk:
+            replacement = (chunk,)
+        else:
+            replacement = ()
+        chunks = self.chunks[:index] + replacement + self.chunks[index + 1 :]
+        return ScreenRecords(chunks, length)
+
+    def set(self, record: ScreenRecord) -> ScreenRecords:
+        """Adds record, or replaces the one with its key. Returns self if equal."""
+        if not self.chunks:
+            return ScreenRecords(((record,),), 1)
+
+        index = self._chunk_of(record.key)
+        chunk = self.chunks[index]
+        for i, old in enumerate(chunk):
+            if old.key == record.key:
+                if old == record:
+                    return self
+                chunk = chunk[:i] + (record,) + chunk[i + 1 :]
+                return self._replace_chunk(index, chunk, self.length)
+            if old.key > record.key:
+                chunk = chunk[:i] + (record,) + chunk[i:]
+                return self._replace_chunk(index, chunk, self.length + 1)
+        return self._replace_chunk(index, chunk + (record,), self.length + 1)
+
+    def remove(self, key: int) -> ScreenRecords:
+        """Drops the record with key. Returns self if there is none."""
+        if not self.chunks:
+            return self
+        index = self._chunk_of(key)
+        chunk = self.chunks[index]
+        for i, old in enumerate(chunk):
+            if old.key == key:
+                chunk = chunk[:i] + chunk[i + 1 :]
+                return self._replace_chunk(index, chunk, self.length - 1)
+        return self
+
+    def diff(
+        self, other: ScreenRecords
+    ) -> Iterator[tuple[ScreenRecord | None, ScreenRecord | None]]:
+        """Yields (ours, theirs) for every key whose record differs, in key order.
+        None stands for a record the side doesn't have."""
+        if other is self:
+            return
+        shared = {id(chunk) for chunk in self.chunks} & {
+            id(chunk) for chunk in other.chunks
+        }
+        ours = {r.key: r for c in self.chunks if id(c) not in shared for r in c}
+        theirs = {r.key: r for c in other.chunks if id(c) not in shared for r in c}
+        for key in sorted(ours.keys() | theirs.keys()):
+            old, new = ours.get(key), theirs.get(key)
+            if old != new:
+                yield old, new
+
+
+# HISTORY ========================================
+class History:
+    """Undo and redo stacks of Layouts for one Grid. Call commit after every user
+    edit; undo and redo apply a step to the live model and return its Changes."""
+
+    def __init__(self, grid: ss.Grid, limit: int = 1000) -> None:
+        self.grid = grid
+        self._keys: dict[ss.Screen, int] = {}
+        self._screens: dict[int, ss.Screen] = {}
+        self._next_key = 0
+
+        for screen in grid.screens or ():
+            self._track(screen)
+        self.current = Layout(
+            self._canvas_record(),
+            self._margin_record(),
+            self._grid_record(),
+            ScreenRecords.from_records(
+                [self._screen_record(screen) for screen in grid.screens or ()]
+            ),
+        )
+        # screens placed, moved or removed since the last commit, in the order they
+        # first changed. Held weakly by the grid, a dropped History stops listening
+        self.changed: dict[ss.Screen, None] = {}
+        grid.occupancy.listeners.subscribe(self._screen_changed)
+
+        self.undo_stack: deque[Layout] = deque(maxlen=limit)
+        self.redo_stack: list[Layout] = []
+
+    # RECORDS ========================================
+    def _canvas_record(self) -> CanvasRecord:
+        return CanvasRecord(*self.grid.canvas.resolution)
+
+    def _margin_record(self) -> MarginRecord:
+        mg = self.grid.margin
+        return MarginRecord(
+            mg._top_px, mg._left_px, mg._bottom_px, mg._right_px, mg._gutter_px
+        )
+
+    def _grid_record(self) -> GridRecord:
+        return GridRecord(*self.grid.composition)
+
+    def _screen_record(self, screen: ss.Screen) -> ScreenRecord:
+        key = self._keys[screen]
+        spans = screen._colspan, screen._rowspan
+        return ScreenRecord(key, *spans, screen._col, screen._row)
+
+    def _track(self, screen: ss.Screen, key: int = None) -> int:
+        if key is None:
+            key = self._next_key
+            self._next_key += 1
+        self._keys[screen] = key
+        self._screens[key] = screen
+        return key
+
+    def _untrack(self, key: int) -> ss.Screen:
+        screen = self._screens.pop(key)
+        del self._keys[screen]
+        return screen
+
+    # RECORDING ========================================
+    def _screen_changed(self, screen: ss.Screen) -> None:
+        self.changed[screen] = None
+
+    def commit(self) -> bool:
+        """Records the model as a new step if anything changed since the last one.
+        Clears the redo stack when it does. Returns whether it did."""
+
+        current = self.current
+        canvas, margin, grid = current.canvas, current.margin, current.grid
+        if self._canvas_record() != canvas:
+            canvas = self._canvas_record()
+        if self._margin_record() != margin:
+            margin = self._margin_record()
+        if self._grid_record() != grid:
+            grid = self._grid_record()
+
+        screens = current.screens
+        occupancy = self.grid.occupancy
+        for screen in self.changed:
+            key = self._keys.get(screen)
+            if screen in occupancy:
+                if key is None:  # new screens go last, like in grid.screens
+                    self._track(screen)
+                screens = screens.set(self._screen_record(screen))
+            elif key is not None:
+                screens = screens.remove(key)
+                self._untrack(key)
+        self.changed.clear()
+
+        layout = Layout(canvas, margin, grid, screens)
+        if all(new is old for new, old in zip(layout, current)):
+            return False
+        self.undo_stack.append(current)
+        self.current = layout
+        self.redo_stack.clear()
+        return True
+
+    # UNDO AND REDO ========================================
+    def undo(self) -> Changes | None:
+        """Goes back one step. None if there is nothing to undo."""
+        if not self.undo_stack:
+            return None
+        self.commit()  # edits nobody committed yet are a step of their own
+        target = self.undo_stack.pop()
+        self.redo_stack.append(self.current)
+        return self._apply(target)
+
+    def redo(self) -> Changes | None:
+        """Goes forward one step. None if there is nothing to redo."""
+        if not self.redo_stack or self.commit():  # new edits make redo stale
+            return None
+        target = self.redo_stack.pop()
+        self.undo_stack.append(self.current)
+        return self._apply(target)
+
+    def _apply(self, target: Layout) -> Changes:
+        """Turns the live model into target, touching only what differs."""
+
+        current = self.current
+        grid = self.grid
+        removed, added, edited = [], [], []
+
+        with grid.batch():
+            if target.canvas != current.canvas:
+                grid.canvas.resolution = tuple(target.canvas)
+            if target.margin != current.margin:
+                *tlbr, gutter = target.margin
+                grid.margin.tlbr = tuple(tlbr)
+                grid.margin.gutter = gutter
+            if target.grid != current.grid:
+                grid.composition = tuple(target.grid)
+
+            for old, new in current.screens.diff(target.screens):
+                if new is None:
+                    screen = self._untrack(old.key)
+                    screen.delete()
+                    removed.append(screen)
+                elif old is None:
+                    _, colspan, rowspan, col, row = new
+                    screen = ss.Screen(grid, colspan, rowspan, col, row)
+                    grid.reorder_screen(screen, self._position_of(new.key))
+                    self._track(screen, new.key)
+                    added.append(screen)
+                else:
+                    screen = self._screens[new.key]
+                    screen.edit(*new[1:])
+                    edited.append(screen)
+
+        self.changed.clear()  # applying a step isn't a new one
+        self.current = target
+        layout = any(t != c for t, c in zip(target[:3], current[:3]))
+        return Changes(removed, added, edited, layout)
+
+    def _position_of(self, key: int) -> int:
+        """Where a screen with key goes in grid.screens to keep the merge order."""
+        screens = self.grid.screens
+        keys = self._keys
+        low, high = 0, len(screens) - 1  # the last one is the screen being placed
+        while low < high:
+            middle = (low + high) // 2
+            if keys[screens[middle]] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
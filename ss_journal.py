@@ -0,0 +1,270 @@
+"""
+Autosave for the working layout, restored on the next start.
+
+Every recorded change is appended to journal.jsonl as one line of operations against
+the previous layout:
+
+    {"seq": 12, "ops": [["screen", 4, 2, 2, 7, 1], ["delete", 3], ["margin", 25, ...]]}
+
+Appends, and everything else touching the files, happen on a background thread, which
+fsyncs the journal whenever it catches up. Every SNAPSHOT_EVERY lines the whole layout
+goes to snapshot.json, written next to it and moved in place with os.replace, then the
+journal starts over once the rename is on disk. Startup reads the
+snapshot and replays only the journal lines after it, so restoring costs the same
+after ten edits or ten thousand.
+
+snapshot.json is a layout spec, like defaults.json plus screens, so ss_batch.py
+renders it as is.
+"""
+
+from __future__ import annotations
+import json
+import os
+import queue
+import threading
+from ss_export import write_atomic
+from ss_history import (
+    CanvasRecord,
+    GridRecord,
+    Layout,
+    MarginRecord,
+    ScreenRecord,
+    ScreenRecords,
+)
+
+JOURNAL = "journal.jsonl"
+SNAPSHOT = "snapshot.json"
+SNAPSHOT_EVERY = 200  # journal lines between snapshots, bounds what startup replays
+
+
+# OPERATIONS ========================================
+def layout_ops(old: Layout, new: Layout) -> list[list]:
+    """What turns old into new. Only looks at what the two layouts don't share."""
+    ops = []
+    if new.canvas != old.canvas:
+        ops.append(["canvas", *new.canvas])
+    if new.margin != old.margin:
+        ops.append(["margin", *new.margin])
+    if new.grid != old.grid:
+        ops.append(["grid", *new.grid])
+    for ours, theirs in old.screens.diff(new.screens):
+        if theirs is None:
+            ops.append(["delete", ours.key])
+        else:
+            ops.append(["screen", *theirs])
+    return ops
+
+
+def apply_ops(layout: Layout, ops: list[list]) -> Layout:
+    canvas, margin, grid, screens = layout
+    for kind, *values in ops:
+        if kind == "canvas":
+            canvas = CanvasRecord(*values)
+        elif kind == "margin":
+            margin = MarginRecord(*values)
+        elif kind == "grid":
+            grid = GridRecord(*values)
+        elif kind == "screen":
+            screens = screens.set(ScreenRecord(*values))
+        elif kind == "delete":
+            screens = screens.remove(values[0])
+    return Layout(canvas, margin, grid, screens)
+
+
+# SPECS ========================================
+def layout_to_spec(layout: Layout) -> dict:
+    """The layout in the defaults.json / ss_batch.py spec format."""
+    return {
+        "canvas": layout.canvas._asdict(),
+        "margin": layout.margin._asdict(),
+        "grid": layout.grid._asdict(),
+        "screens": [screen._asdict() for screen in layout.screens],
+    }
+
+
+def spec_to_layout(spec: dict) -> Layout:
+    screens = spec.get("screens", [])
+    records = [
+        ScreenRecord(
+            screen.get("key", i),
+            screen["colspan"],
+            screen["rowspan"],
+            screen["col"],
+            screen["row"],
+        )
+        for i, screen in enumerate(screens)
+    ]
+    return Layout(
+        CanvasRecord(**spec["canvas"]),
+        MarginRecord(**spec["margin"]),
+        GridRecord(**spec["grid"]),
+        ScreenRecords.from_records(sorted(records)),
+    )
+
+
+# RESTORING ========================================
+def check_layout(layout: Layout) -> Layout:
+    """Raises ValueError if the model can't be built from layout, e.g. a hand edited
+    snapshot with no columns or a screen before the first one."""
+    width, height = layout.canvas
+    top, left, bottom, right, gutter = layout.margin
+    cols, rows = layout.grid
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Canvas {width}x{height} has no area.")
+    if cols < 1 or rows < 1:
+        raise ValueError(f"Grid {cols}x{rows} has no cells.")
+    if min(layout.margin) < 0:
+        raise ValueError(f"Negative margin in {tuple(layout.margin)}.")
+    if (
+        left + right + gutter * (cols - 1) >= width
+        or top + bottom + gutter * (rows - 1) >= height
+    ):
+        raise ValueError("Margins and gutters leave no room for the cells.")
+    # screens may reach past the last col or row: shrinking the grid leaves them so
+    for screen in layout.screens:
+        if min(screen.colspan, screen.rowspan, screen.col, screen.row) < 1:
+            raise ValueError(f"{screen} is outside the grid.")
+    return layout
+
+
+def restore(directory: str | os.PathLike) -> tuple[Layout | None, int]:
+    """Returns the last recorded layout and its sequence number, (None, 0) if there
+    is none. A line cut short by a crash ends the replay. Raises ValueError if the
+    layout can't be built (see check_layout)."""
+
+    try:
+        with open(os.path.join(directory, SNAPSHOT), "r") as _:
+            snapshot = json.load(_)
+    except FileNotFoundError:
+        return None, 0
+    layout = spec_to_layout(snapshot)
+    seq = snapshot["seq"]
+
+    try:
+        with open(os.path.join(directory, JOURNAL), "r") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if entry["seq"] <= seq:  # already in the snapshot
+                    continue
+                layout = apply_ops(layout, entry["ops"])
+                seq = entry["seq"]
+    except FileNotFoundError:
+        pass
+    return check_layout(layout), seq
+
+
+# JOURNAL ========================================
+def sync_directory(directory: str | os.PathLike) -> None:
+    """Puts renames in directory on disk. Windows can't open directories, and
+    doesn't need it."""
+    if os.name == "nt":
+        return
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class Journal:
+    """Records layouts as they change. start it with the layout the session begins
+    from, record every layout after that, close it on exit."""
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        seq: int = 0,
+        snapshot_every: int = SNAPSHOT_EVERY,
+    ) -> None:
+        """seq continues the numbering restore returned, so lines left over from the
+        last session never replay on top of this one's snapshots."""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.seq = seq
+        self.snapshot_every = snapshot_every
+        self.last: Layout = None
+        self._since_snapshot = 0
+        self.error: Exception = None  # what stopped the writer, raised by record and close
+
+        # (kind, seq, ops or layout), None to stop. Layouts are immutable, so the
+        # writer can serialize them while the GUI keeps editing
+        self._queue: queue.Queue[tuple | None] = queue.Queue()
+        self._thread = threading.Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def start(self, layout: Layout) -> None:
+        """Snapshots the layout the session begins from and empties the journal."""
+        self.last = layout
+        self._snapshot()
+
+    def record(self, layout: Layout) -> None:
+        """Journals whatever changed since the last recorded layout. Raises what
+        stopped the writer thread, if it stopped."""
+        self._raise_error()
+        ops = layout_ops(self.last, layout)
+        if not ops:
+            return
+        self.seq += 1
+        self.last = layout
+        self._queue.put(("ops", self.seq, ops))
+
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self._snapshot()
+
+    def close(self) -> None:
+        """Snapshots the last layout and waits for everything to be written. Raises
+        what stopped the writer thread, if it stopped."""
+        if self.last is not None and self._since_snapshot:
+            self._snapshot()
+        self._queue.put(None)
+        self._thread.join()
+        self._raise_error()
+
+    def _raise_error(self) -> None:
+        if self.error is not None:
+            raise self.error
+
+    def _snapshot(self) -> None:
+        self._queue.put(("snapshot", self.seq, self.last))
+        self._since_snapshot = 0
+
+    # WRITER THREAD ========================================
+    def _write(self) -> None:
+        """Runs until close. An exception stops it, and is kept in self.error."""
+        try:
+            self._write_until_closed()
+        except Exception as error:
+            self.error = error
+
+    def _write_until_closed(self) -> None:
+        journal_path = os.path.join(self.directory, JOURNAL)
+        snapshot_path = os.path.join(self.directory, SNAPSHOT)
+        journal = open(journal_path, "a", encoding="utf-8")
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                kind, seq, payload = item
+                if kind == "ops":
+                    entry = {"seq": seq, "ops": payload}
+                    journal.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                    if self._queue.empty():
+                        journal.flush()
+                        os.fsync(journal.fileno())
+                    continue
+
+                spec = layout_to_spec(payload)
+                spec["seq"] = seq
+                write_atomic(snapshot_path, json.dumps(spec, indent=4))
+                sync_directory(self.directory)
+                # lines up to seq are in the snapshot now, and the snapshot is on
+                # disk. If we stop before truncating, restore skips them by their seq
+                journal.close()
+                journal = open(journal_path, "w", encoding="utf-8")
+        finally:
+            journal.close()
@@ -0,0 +1,63 @@
+import json
+import os
+import pytest
+import ss_batch
+
+
+def spec(name, cols=12, **extra):
+    return {
+        "name": name,
+        "canvas": {"width": 1920, "height": 1080},
+        "margin": {"top": 25, "left": 25, "bottom": 25, "right": 25, "gutter": 25},
+        "grid": {"cols": cols, "rows": 6},
+        "screens": [{"colspan": 6, "rowspan": 6, "col": 1, "row": 1}],
+        **extra,
+    }
+
+
+def write_specs(directory, filename, specs):
+    path = os.path.join(directory, filename)
+    with open(path, "w") as _:
+        json.dump(specs, _)
+    return path
+
+
+@pytest.mark.parametrize("name", ["../escape", "a/b", "..", ""])
+def test_names_with_path_separators_are_rejected(tmp_path, name):
+    path = write_specs(tmp_path, "specs.json", [spec(name)])
+    with pytest.raises(ValueError, match="plain file name"):
+        ss_batch.load_specs([path])
+
+
+def test_duplicate_names_are_reported(tmp_path):
+    first = write_specs(tmp_path, "first.json", spec("wall"))
+    second = write_specs(tmp_path, "second.json", [spec("other"), spec("wall")])
+    with pytest.raises(ValueError, match="first.json") as error:
+        ss_batch.load_specs([first, second])
+    assert "second.json" in str(error.value)
+
+
+def test_failing_specs_leave_no_output_and_keep_the_manifest(tmp_path):
+    output = tmp_path / "out"
+    specs = [("zero_cols", spec("zero_cols", cols=0)), ("../escape", spec("x"))]
+
+    report = ss_batch.render_batch(specs, str(output), workers=2)
+
+    assert report["failed"] == 2 and report["rendered"] == 0
+    assert sorted(os.listdir(output)) == [ss_batch.MANIFEST]
+    with open(output / ss_batch.MANIFEST) as _:
+        assert json.load(_) == {}
+
+
+def test_one_failing_spec_doesnt_stop_the_others(tmp_path):
+    pytest.importorskip("pysion")
+    output = tmp_path / "out"
+    specs = [("good", spec("good")), ("zero_cols", spec("zero_cols", cols=0))]
+
+    report = ss_batch.render_batch(specs, str(output), workers=2)
+
+    assert report["failed"] == 1 and report["rendered"] == 1
+    assert (output / "good.setting").stat().st_size > 0
+    assert not (output / "zero_cols.setting").exists()
+    with open(output / ss_batch.MANIFEST) as _:
+        assert list(json.load(_)) == ["good"]
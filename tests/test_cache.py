@@ -0,0 +1,16 @@
+import os
+from ss_cache import RenderCache
+
+
+def test_entry_evicted_while_being_read_is_still_served(tmp_path, monkeypatch):
+    cache = RenderCache(directory=tmp_path)
+    cache._write_disk("key", "output")
+    utime = os.utime
+
+    def evict_then_utime(path, *args, **kwargs):
+        os.remove(path)  # another process evicts between the read and the utime
+        return utime(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "utime", evict_then_utime)
+    assert cache._read_disk("key") == "output"
+    assert cache._read_disk("key") is None
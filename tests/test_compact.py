@@ -0,0 +1,48 @@
+import pytest
+import ss_classes as ss
+import ss_export
+
+RESOLUTION = (7680, 4320)
+
+
+def build_wall():
+    """An 8K wall of 31x17 screens with odd margins, so no value is round."""
+    canvas = ss.Canvas(RESOLUTION)
+    margin = ss.Margin(canvas, tlbr=(37, 11, 23, 29), gutter=7)
+    grid = ss.Grid(canvas, margin, (31, 17))
+    for col in range(1, 32):
+        for row in range(1, 18):
+            ss.Screen(grid, 1, 1, col, row)
+    ss.Screen(grid, 13, 9, 3, 5)
+    return grid
+
+
+def test_compact_values_stay_under_a_pixel_at_8k():
+    width, height = RESOLUTION
+    pixels = {  # per normalized unit
+        "Width": width,
+        "Center.X": width,
+        "Height": height,
+        "Center.Y": height,
+        "Size": max(width, height),
+    }
+    values = [screen.get_values() for screen in build_wall().screens]
+
+    error = max(
+        abs(rounded[key] - screen[key]) * pixels[key]
+        for screen in values
+        for rounded in [ss_export.round_values(screen, ss_export.COMPACT_DECIMALS)]
+        for key in pixels
+    )
+    assert 0 < error < 1
+
+
+def test_compact_render_uses_the_rounded_values():
+    pytest.importorskip("pysion")
+    values = [screen.get_values() for screen in build_wall().screens]
+    decimals = ss_export.COMPACT_DECIMALS
+
+    compact = ss_export.render_fusion_output(values, RESOLUTION, compact=decimals)
+    rounded = [ss_export.round_values(screen, decimals) for screen in values]
+    expected = ss_export.minify(ss_export.render_fusion_output(rounded, RESOLUTION))
+    assert compact == expected
@@ -0,0 +1,35 @@
+import ss_classes as ss
+from ss_export import crop_rectangle
+
+
+def test_full_canvas_screen_crops_nothing():
+    assert crop_rectangle((1920, 1080), 1.0, 1.0, 1.0) == (0, 0, 1920, 1080)
+
+
+def test_corner_screen_crops_its_aspect_centered():
+    canvas = ss.Canvas((1920, 1080))
+    grid = ss.Grid(canvas, ss.Margin(canvas, 0, gutter=0), (4, 2))
+    corner = ss.Screen(grid, 1, 1, 4, 2).get_values()  # top right, 480x540 px
+
+    keys = ("Width", "Height", "Size")
+    crop = crop_rectangle((1920, 1080), *(corner[key] for key in keys))
+
+    # merged at Size = 540 / 1080 the footage is halved, so 960 x 1080 of it shows
+    assert crop == (480, 0, 960, 1080)
+
+
+def test_fractional_sizes_round_up_to_cover_the_mask():
+    # 1081 * 0.25 / 0.5 = 540.5 px of footage, the crop keeps 541
+    assert crop_rectangle((1921, 1081), 0.5, 0.25, 0.5) == (0, 270, 1921, 541)
+    # a 62 px wide screen: 1920 * (62 / 1920) is 62.00000000000001, still 62
+    assert crop_rectangle((1920, 1080), 62 / 1920, 1.0, 1.0)[2] == 62
+
+
+def test_odd_leftover_pixel_goes_after_the_crop():
+    x_offset, _, x_size, _ = crop_rectangle((1920, 1080), 961 / 1920, 1.0, 1.0)
+    assert (x_offset, x_size) == (479, 961)
+    assert 1920 - x_offset - x_size == 480
+
+
+def test_crop_never_exceeds_the_footage():
+    assert crop_rectangle((1920, 1080), 1.0, 0.5, 0.5) == (0, 0, 1920, 1080)
@@ -0,0 +1,94 @@
+import re
+import pytest
+
+pytest.importorskip("pysion")
+import ss_classes as ss  # noqa: E402
+import ss_export  # noqa: E402
+
+RESOLUTION = (1920, 1080)
+TOOL = re.compile(r"(\w+)\s*=\s*(Background|Merge|MediaIn|RectangleMask|Crop)\s*\{")
+VALUE = re.compile(r"(\w+)\s*=\s*Input\s*\{\s*Value\s*=\s*(\{[^}]*\}|[^,}]+)")
+
+
+def parse_tools(text):
+    """{tool name: {input: value}} for the Value inputs of every tool in text."""
+    starts = list(TOOL.finditer(text))
+    tools = {}
+    for match, after in zip(starts, starts[1:] + [None]):
+        body = text[match.end() : after.start() if after else len(text)]
+        tools[match.group(1)] = {
+            name: re.sub(r"\s", "", value) for name, value in VALUE.findall(body)
+        }
+    return tools
+
+
+def build_grid():
+    canvas = ss.Canvas(RESOLUTION)
+    grid = ss.Grid(canvas, ss.Margin(canvas, 20, gutter=10), (12, 6))
+    for col in (1, 4, 7, 10):
+        ss.Screen(grid, 3, 3, col, 1)
+    return grid
+
+
+def values_of(grid):
+    return [screen.get_values() for screen in grid.screens]
+
+
+def assert_matches_full_render(delta, values, **options):
+    full = parse_tools(ss_export.render_fusion_output(values, RESOLUTION, **options))
+    for name, inputs in parse_tools(delta).items():
+        assert inputs, name
+        for key, value in inputs.items():
+            assert full[name][key] == value, (name, key)
+
+
+def test_unchanged_layout_has_no_delta():
+    values = values_of(build_grid())
+    assert ss_export.render_fusion_delta(values, values, RESOLUTION) is None
+
+
+def test_delta_needs_a_previous_export():
+    values = values_of(build_grid())
+    with pytest.raises(ValueError):
+        ss_export.render_fusion_delta(None, values, RESOLUTION)
+
+
+def test_one_changed_screen_only_updates_its_tools():
+    grid = build_grid()
+    before = values_of(grid)
+    grid.screens[2].edit(3, 2, 7, 4)  # moves and shrinks
+    after = values_of(grid)
+
+    delta = ss_export.render_fusion_delta(before, after, RESOLUTION)
+
+    assert set(parse_tools(delta)) == {"SSMerge3", "SSMask3"}
+    assert set(parse_tools(delta)["SSMask3"]) == {"Center", "Height"}
+    assert_matches_full_render(delta, after)
+
+
+def test_crop_delta_carries_the_new_crop():
+    grid = build_grid()
+    before = values_of(grid)
+    grid.screens[0].edit(2, 3, 1, 1)
+    after = values_of(grid)
+
+    delta = ss_export.render_fusion_delta(before, after, RESOLUTION, "crop")
+
+    assert set(parse_tools(delta)) == {"SSMerge1", "SSCrop1"}
+    assert_matches_full_render(delta, after, compositing="crop")
+
+
+def test_compact_delta_ignores_changes_under_its_decimals():
+    grid = build_grid()
+    before = values_of(grid)
+    nudged = [{**screen, "Size": screen["Size"] + 1e-9} for screen in before]
+    decimals = ss_export.COMPACT_DECIMALS
+    assert ss_export.render_fusion_delta(before, nudged, compact=decimals) is None
+
+    grid.screens[3].edit(2, 2, 11, 5)
+    after = values_of(grid)
+    delta = ss_export.render_fusion_delta(before, after, compact=decimals)
+
+    assert set(parse_tools(delta)) == {"SSMerge4", "SSMask4"}
+    assert "\t" not in delta and "\n" not in delta
+    assert_matches_full_render(delta, after, compact=decimals)
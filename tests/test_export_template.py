@@ -0,0 +1,57 @@
+import pytest
+import ss_classes as ss
+
+pytest.importorskip("pysion")
+import ss_export  # noqa: E402
+
+# resolution, margin, gutter, composition, screens as (colspan, rowspan, col, row)
+LAYOUTS = [
+    ((1920, 1080), 25, 25, (12, 6), [(6, 6, 1, 1), (6, 3, 7, 1), (6, 3, 7, 4)]),
+    ((3840, 2160), 0, 0, (4, 4), [(1, 1, i % 4 + 1, i // 4 + 1) for i in range(16)]),
+    ((1080, 1920), 13, 7, (3, 7), [(3, 2, 1, 1), (1, 5, 2, 3)]),
+    (
+        (7680, 4320),
+        20,
+        10,
+        (32, 18),
+        [(1, 1, i % 32 + 1, i // 32 + 1) for i in range(120)],
+    ),
+]
+
+
+def screen_values(layout):
+    resolution, margin, gutter, composition, screens = layout
+    canvas = ss.Canvas(resolution)
+    grid = ss.Grid(canvas, ss.Margin(canvas, margin, gutter=gutter), composition)
+    for screen in screens:
+        ss.Screen(grid, *screen)
+    return [screen.get_values() for screen in grid.screens], resolution
+
+
+@pytest.mark.parametrize("fusion_studio", [False, True])
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_template_screens_match_pysion(layout, fusion_studio):
+    values, resolution = screen_values(layout)
+    for index, screen in enumerate(values):
+        kwargs = {
+            "Width": screen["Width"],
+            "Height": screen["Height"],
+            "CenterX": screen["Center.X"],
+            "CenterY": screen["Center.Y"],
+            "Size": screen["Size"],
+        }
+        args = ("SSCanvas", resolution, index, fusion_studio)
+        expected = ss_export.create_screen(*args, **kwargs)
+        filled = ss_export.create_screen_from_template(*args, **kwargs)
+        assert filled == expected
+
+
+@pytest.mark.parametrize("fusion_studio", [False, True])
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_template_render_matches_pysion(layout, fusion_studio):
+    values, resolution = screen_values(layout)
+    pysion = ss_export.render_fusion_output(values, resolution, fusion_studio)
+    template = ss_export.render_fusion_output(
+        values, resolution, fusion_studio, backend="template"
+    )
+    assert template == pysion
@@ -0,0 +1,113 @@
+from concurrent.futures import Future
+import pytest
+
+pytest.importorskip("tkinter")
+from SplitScreener import ScreenSplitter as SS  # noqa: E402
+
+VALUES = [
+    {"Width": 0.5, "Height": 0.5, "Center.X": 0.25, "Center.Y": 0.25, "Size": 0.5}
+]
+SNAPSHOT = ((1920, 1080), True, "tree", "merge", False, VALUES)
+
+
+class Status:
+    def __init__(self):
+        self.texts = []
+
+    def set(self, text):
+        self.texts.append(text)
+
+
+class Widget:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, function, *args):
+        self.scheduled.append((function, args))
+
+
+@pytest.fixture
+def export_state(monkeypatch):
+    status = Status()
+    monkeypatch.setattr(SS, "status_text", status)
+    monkeypatch.setattr(SS, "export_generation", 1)
+    monkeypatch.setattr(SS, "export_job", None)
+    monkeypatch.setattr(SS, "export_started", 0.0, raising=False)
+    monkeypatch.setattr(SS, "export_stage", "Rendering 1 screens", raising=False)
+    monkeypatch.setattr(SS, "fusion_export", None)
+    monkeypatch.setattr(SS, "last_export", None, raising=False)
+    return status
+
+
+def finished(result=None, error=None):
+    job = Future()
+    if error is not None:
+        job.set_exception(error)
+    else:
+        job.set_result(result)
+    return job
+
+
+def test_a_superseded_render_is_not_copied(export_state, monkeypatch):
+    class Cache:
+        def render(self, *args, **kwargs):
+            SS.export_generation += 1  # a click while rendering
+            return "tree"
+
+    monkeypatch.setattr(SS, "render_cache", Cache())
+    assert SS.render_export(1, SNAPSHOT) is None
+    assert SS.export_stage == "Rendering 1 screens"
+
+
+def test_an_unchanged_delta_copies_nothing(export_state):
+    message, export = SS.render_export(1, SNAPSHOT, [dict(VALUES[0])])
+    assert message == "Nothing changed since the last export."
+    assert export is None
+
+
+def test_polling_reschedules_until_the_job_is_done(export_state):
+    widget, job = Widget(), Future()
+    SS.export_job = job
+    SS.poll_export(widget, job, SNAPSHOT, "")
+
+    assert export_state.texts[-1].startswith("Rendering 1 screens... ")
+    assert widget.scheduled == [(SS.poll_export, (widget, job, SNAPSHOT, ""))]
+
+
+def test_a_finished_job_reports_and_keeps_the_export(export_state):
+    job = finished(("Node tree successfuly copied to clipboard.", "tree"))
+    SS.export_job = job
+    SS.poll_export(Widget(), job, SNAPSHOT, " (2 culled)")
+
+    assert SS.export_job is None
+    assert SS.fusion_export == "tree" and SS.last_export is SNAPSHOT
+    assert export_state.texts[-1] == (
+        "Node tree successfuly copied to clipboard. (2 culled)"
+    )
+
+
+def test_a_nothing_changed_delta_keeps_the_last_export(export_state):
+    job = finished(("Nothing changed since the last export.", None))
+    SS.export_job = job
+    SS.poll_export(Widget(), job, SNAPSHOT, "")
+
+    assert SS.fusion_export is None and SS.last_export is None
+    assert export_state.texts == ["Nothing changed since the last export."]
+
+
+def test_a_superseded_job_does_not_report(export_state):
+    widget, job = Widget(), finished(("old", "old tree"))
+    SS.export_job = Future()  # the newer export
+    SS.poll_export(widget, job, SNAPSHOT, "")
+
+    assert export_state.texts == [] and widget.scheduled == []
+    assert SS.fusion_export is None
+
+
+def test_a_failed_job_reports_the_error(export_state):
+    job = finished(error=RuntimeError("xclip not found"))
+    SS.export_job = job
+    SS.poll_export(Widget(), job, SNAPSHOT, "")
+
+    assert SS.export_job is None and SS.fusion_export is None
+    assert export_state.texts == ["Export failed: xclip not found"]
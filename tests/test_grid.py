@@ -0,0 +1,114 @@
+import pytest
+import ss_classes as ss
+
+# canvas, margins (top, left, bottom, right), gutter and composition in pixels
+LAYOUTS = [
+    ((1920, 1080), (25, 25, 25, 25), 25, (12, 6)),
+    ((3840, 2160), (0, 0, 0, 0), 0, (4, 4)),
+    ((1080, 1920), (40, 13, 7, 21), 9, (3, 7)),
+]
+
+
+def build_grid(resolution, tlbr, gutter, composition):
+    canvas = ss.Canvas(resolution)
+    return ss.Grid(canvas, ss.Margin(canvas, tlbr=tlbr, gutter=gutter), composition)
+
+
+def expected_cell(resolution, tlbr, gutter, composition, col, row):
+    """Normalized (x, y, width, height) of a cell, from the pixels, one at a time."""
+    width, height = resolution
+    top, left, bottom, right = tlbr
+    cols, rows = composition
+    cell_width = (width - left - right - gutter * (cols - 1)) / cols
+    cell_height = (height - top - bottom - gutter * (rows - 1)) / rows
+    x = left + (col - 1) * (cell_width + gutter) + cell_width / 2
+    # row 1 is at the bottom
+    y = bottom + (row - 1) * (cell_height + gutter) + cell_height / 2
+    return x / width, y / height, cell_width / width, cell_height / height
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_cells_match_per_cell_geometry(layout):
+    grid = build_grid(*layout)
+    for cell in ss.GridCell.generate_all(grid):
+        expected = expected_cell(*layout, cell.col, cell.row)
+        assert (cell.x, cell.y, cell.width, cell.height) == pytest.approx(expected)
+
+
+def test_cells_follow_margin_edits_without_subscribing():
+    layout = LAYOUTS[0]
+    grid = build_grid(*layout)
+    cells = ss.GridCell.generate_all(grid)
+    subscribers = len(grid._children)
+
+    grid.margin.all = 60
+    edited = (layout[0], (60, 60, 60, 60), 25, layout[3])
+    assert len(grid._children) == subscribers
+    for cell in cells:
+        expected = expected_cell(*edited, cell.col, cell.row)
+        assert (cell.x, cell.y, cell.width, cell.height) == pytest.approx(expected)
+
+
+def test_cells_read_their_own_grid():
+    first, second = build_grid(*LAYOUTS[0]), build_grid(*LAYOUTS[2])
+    first_cell = ss.GridCell.generate_all(first)[5]
+    second_cell = ss.GridCell.generate_all(second)[5]
+    assert first_cell.width == pytest.approx(expected_cell(*LAYOUTS[0], 6, 1)[2])
+    assert second_cell.width == pytest.approx(expected_cell(*LAYOUTS[2], 3, 2)[2])
+
+
+@pytest.mark.parametrize("composition", [(1, 1), (12, 6), (3, 7), (200, 200)])
+def test_index_mapping_matches_the_matrix(composition):
+    grid = build_grid((1920, 1080), (0, 0, 0, 0), 0, composition)
+    matrix = grid.matrix
+    for r, row in enumerate(matrix, 1):
+        for c, index in enumerate(row, 1):
+            assert grid.index_to_coords(index) == (c, r)
+            assert grid.coords_to_index(c, r) == index
+            assert ss.get_coords(index, matrix) == (c, r)
+
+
+def test_matrix_is_cached_per_composition():
+    grid = build_grid(*LAYOUTS[0])
+    matrix = grid.matrix
+    grid.margin.all = 10
+    assert grid.matrix is matrix
+    grid.composition = (4, 3)
+    assert grid.matrix == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10, 11, 12]]
+
+
+def test_screen_from_any_two_corner_cells():
+    grid = build_grid(*LAYOUTS[0])  # 12 x 6
+    for first, second in ((14, 40), (40, 14), (16, 38), (38, 16)):
+        screen = ss.Screen.create_from_coords(grid, first, second)
+        assert (screen.col, screen.row, screen.colspan, screen.rowspan) == (2, 2, 3, 3)
+
+
+def test_refreshes_reuse_the_cell_pool():
+    grid = build_grid(*LAYOUTS[0])
+    ss.Screen(grid, 2, 2, 1, 1)
+    cells = ss.GridCell.generate_all(grid)
+    ids = [id(cell) for cell in cells]
+
+    for _ in range(50):
+        assert [id(cell) for cell in ss.GridCell.generate_all(grid)] == ids
+        grid.margin.all = grid.margin._top_px % 40 + 1
+    assert len(grid._cells) == 72
+    assert grid.callbacks_per_compute == 1  # the screen, never the cells
+
+
+def test_pool_follows_the_composition():
+    grid = build_grid(*LAYOUTS[0])
+    kept = ss.GridCell.generate_all(grid)[:20]
+
+    grid.composition = (5, 4)
+    cells = ss.GridCell.generate_all(grid)
+    assert len(cells) == 20
+    assert all(a is b for a, b in zip(cells, kept))  # reused, re-indexed
+    assert [(cell.col, cell.row) for cell in cells[4:6]] == [(5, 1), (1, 2)]
+
+    grid.composition = (8, 8)
+    cells = ss.GridCell.generate_all(grid)
+    assert len(cells) == 64
+    assert [cell.index for cell in cells] == list(range(1, 65))
+    assert (cells[-1].col, cells[-1].row) == (8, 8)
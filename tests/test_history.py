@@ -0,0 +1,69 @@
+import gc
+import ss_classes as ss
+from ss_history import History
+
+
+def build_grid(screens=6):
+    canvas = ss.Canvas((1920, 1080))
+    grid = ss.Grid(canvas, ss.Margin(canvas, 20, gutter=10), (12, 6))
+    for i in range(screens):
+        ss.Screen(grid, 2, 2, i + 1, 1)
+    return grid
+
+
+def test_every_history_sees_every_change():
+    grid = build_grid()
+    first, second = History(grid), History(grid)
+
+    grid.screens[0].edit(2, 2, 1, 3)
+
+    assert first.commit() and second.commit()
+    assert list(first.current.screens) == list(second.current.screens)
+
+
+def test_dropped_history_stops_listening():
+    grid = build_grid()
+    listeners = len(grid.occupancy.listeners)
+    History(grid)
+    gc.collect()
+    assert len(grid.occupancy.listeners) == listeners
+
+
+def test_commit_without_changes_keeps_the_redo_stack():
+    grid = build_grid()
+    history = History(grid)
+    grid.screens[0].edit(2, 2, 1, 3)
+    history.commit()
+    history.undo()
+
+    assert not history.commit()
+    assert not history.commit()
+    assert len(history.redo_stack) == 1 and history.redo() is not None
+
+
+def test_undo_puts_recreated_screens_back_in_merge_order():
+    grid = build_grid()
+    before = [(s.col, s.row) for s in grid.screens]
+    history = History(grid)
+
+    for screen in list(grid.screens[1:4]):
+        screen.delete()
+    history.commit()
+    changes = history.undo()
+
+    assert [(s.col, s.row) for s in grid.screens] == before
+    assert changes.added == grid.screens[1:4]
+    assert not history.changed
+
+
+def test_screen_edited_then_deleted_in_one_batch_isnt_recorded():
+    grid = build_grid(screens=1)
+    history = History(grid)
+    screen = grid.screens[0]
+
+    with grid.batch():
+        screen.edit(3, 3, 4, 2)
+        screen.delete()
+
+    assert history.commit()
+    assert list(history.current.screens) == []
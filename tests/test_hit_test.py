@@ -0,0 +1,100 @@
+import pytest
+import ss_classes as ss
+
+# 1024 px canvas, 128 px margins, 64 px gutters: every edge is exact in binary
+MARGIN = 0.125
+WIDTH = 0.140625  # of a cell
+PITCH = 0.203125  # cell plus gutter
+
+
+def build_grid():
+    canvas = ss.Canvas((1024, 1024))
+    return ss.Grid(canvas, ss.Margin(canvas, 128, gutter=64), (4, 4))
+
+
+def inside(point, corners):
+    x, y = point
+    return (
+        corners["bottom_left"][0] <= x <= corners["top_right"][0]
+        and corners["bottom_left"][1] <= y <= corners["top_right"][1]
+    )
+
+
+def scan_cell(grid, point):
+    """What the hit test replaced: every cell's corners, one by one."""
+    for cell in ss.GridCell.generate_all(grid):
+        if inside(point, cell.corners):
+            return cell.index
+    return None
+
+
+def scan_screen(grid, point):
+    for screen in reversed(grid.screens):
+        if inside(point, screen.corners):
+            return screen
+    return None
+
+
+def sample_points(steps=97):
+    """A lattice that lands in margins, gutters and cells, on no edge."""
+    ticks = [(i + 0.5) / steps for i in range(steps)]
+    return [(x, y) for x in ticks for y in ticks]
+
+
+def test_cell_at_matches_the_scan():
+    grid = build_grid()
+    for point in sample_points():
+        assert grid.cell_at(*point) == scan_cell(grid, point), point
+
+
+def test_screen_at_matches_the_scan_topmost_first():
+    grid = build_grid()
+    ss.Screen(grid, 3, 3, 1, 1)
+    ss.Screen(grid, 2, 2, 2, 2)  # overlaps the first one, merged on top
+    ss.Screen(grid, 1, 4, 4, 1)
+    for point in sample_points():
+        assert grid.screen_at(*point) is scan_screen(grid, point), point
+
+
+@pytest.mark.parametrize(
+    "x, y, expected",
+    [
+        (MARGIN / 2, 0.5, None),  # left margin
+        (0.5, 1 - MARGIN / 2, None),  # top margin
+        (MARGIN + WIDTH + 0.01, MARGIN + 0.01, None),  # gutter after col 1
+        (MARGIN + 0.01, MARGIN + WIDTH + 0.01, None),  # gutter above row 1
+        (MARGIN, MARGIN, 1),  # bottom left corner of the first cell
+        (MARGIN + WIDTH, MARGIN + WIDTH, 1),  # its top right corner
+        (MARGIN + PITCH, MARGIN, 2),  # left edge of the next cell
+        (1 - MARGIN, 1 - MARGIN, 16),  # far right and top edge of the grid
+        (1 - MARGIN + 1e-9, 0.5, None),  # just past it
+        (1.0, 1.0, None),
+    ],
+)
+def test_cell_at_edges(x, y, expected):
+    assert build_grid().cell_at(x, y) == expected
+
+
+def test_screen_at_covers_its_own_gutters_only():
+    grid = build_grid()
+    wide = ss.Screen(grid, 2, 1, 1, 1)
+    ss.Screen(grid, 1, 1, 3, 1)
+
+    gutter_inside = MARGIN + WIDTH + 0.01  # between col 1 and 2, inside wide
+    gutter_after = MARGIN + PITCH + WIDTH + 0.01  # between wide and its neighbour
+    assert grid.screen_at(gutter_inside, MARGIN + 0.01) is wide
+    assert grid.screen_at(gutter_after, MARGIN + 0.01) is None
+    assert grid.screen_at(1 - MARGIN, MARGIN) is None  # no screen in col 4
+
+
+def test_screen_at_follows_deletes_and_moves():
+    grid = build_grid()
+    bottom = ss.Screen(grid, 2, 2, 1, 1)
+    top = ss.Screen(grid, 1, 1, 1, 1)
+    point = (MARGIN + 0.01, MARGIN + 0.01)
+
+    assert grid.screen_at(*point) is top
+    top.delete()
+    assert grid.screen_at(*point) is bottom
+    bottom.edit(1, 1, 4, 4)
+    assert grid.screen_at(*point) is None
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+import pytest
+from ss_benchmarks import CORE_MODULES, GUI_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize("module", CORE_MODULES)
+def test_core_module_imports_without_gui_or_export_dependencies(module):
+    code = (
+        f"import sys, {module}\n"
+        f"print(*(m for m in {GUI_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == []
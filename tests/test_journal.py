@@ -0,0 +1,129 @@
+import json
+import os
+import time
+import pytest
+import ss_classes as ss
+import ss_journal
+from ss_history import History
+
+
+def edited_layouts(edits):
+    """The layouts a History records while moving one screen around."""
+    canvas = ss.Canvas((1920, 1080))
+    grid = ss.Grid(canvas, ss.Margin(canvas, 20, gutter=10), (12, 6))
+    for i in range(4):
+        ss.Screen(grid, 2, 2, i + 1, 1)
+    history = History(grid)
+    layouts = [history.current]
+    for i in range(edits):
+        grid.screens[i % 4].edit(2, 2, i % 11 + 2, i % 5 + 2)
+        history.commit()
+        layouts.append(history.current)
+    return layouts
+
+
+def test_restore_returns_the_last_recorded_layout(tmp_path):
+    first, *rest = edited_layouts(25)
+    journal = ss_journal.Journal(tmp_path, snapshot_every=10)
+    journal.start(first)
+    for layout in rest:
+        journal.record(layout)
+    journal.close()
+
+    layout, seq = ss_journal.restore(tmp_path)
+    assert seq == journal.seq
+    assert ss_journal.layout_ops(layout, rest[-1]) == []
+
+
+def test_writer_fsyncs_lines_and_snapshots_before_truncating(tmp_path, monkeypatch):
+    events = []
+    fsync = os.fsync
+    write_atomic = ss_journal.write_atomic
+
+    def record_fsync(descriptor):
+        events.append("fsync")
+        fsync(descriptor)
+
+    def record_snapshot(path, text):
+        write_atomic(path, text)
+        events.append("snapshot")
+
+    monkeypatch.setattr(os, "fsync", record_fsync)
+    monkeypatch.setattr(ss_journal, "write_atomic", record_snapshot)
+    first, second = edited_layouts(1)
+    journal = ss_journal.Journal(tmp_path)
+    journal.start(first)
+    journal.record(second)
+    deadline = time.monotonic() + 10
+    while len(events) < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    journal.close()
+
+    # the snapshot file, the directory before the journal restarts, then the line
+    assert events[:4] == ["fsync", "snapshot", "fsync", "fsync"]
+    # close snapshots again
+    assert events[4:] == ["fsync", "snapshot", "fsync"]
+
+
+def test_writer_errors_are_raised_from_record_and_close(tmp_path, monkeypatch):
+    def full_disk(path, text):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(ss_journal, "write_atomic", full_disk)
+    first, second = edited_layouts(1)
+    journal = ss_journal.Journal(tmp_path)
+    journal.start(first)
+    journal._thread.join(timeout=10)  # the snapshot stops the writer
+
+    with pytest.raises(OSError, match="No space"):
+        journal.record(second)
+    with pytest.raises(OSError, match="No space"):
+        journal.close()
+
+
+def write_snapshot(directory, **changes):
+    spec = {
+        "seq": 3,
+        "canvas": {"width": 1920, "height": 1080},
+        "margin": {"top": 20, "left": 20, "bottom": 20, "right": 20, "gutter": 10},
+        "grid": {"cols": 12, "rows": 6},
+        "screens": [{"key": 0, "colspan": 2, "rowspan": 2, "col": 1, "row": 1}],
+    }
+    for section, values in changes.items():
+        if isinstance(spec[section], dict):
+            spec[section] = {**spec[section], **values}
+        else:
+            spec[section] = values
+    with open(os.path.join(directory, ss_journal.SNAPSHOT), "w") as _:
+        json.dump(spec, _)
+
+
+def test_restore_accepts_a_valid_snapshot(tmp_path):
+    write_snapshot(tmp_path)
+    layout, seq = ss_journal.restore(tmp_path)
+    assert seq == 3 and len(layout.screens) == 1
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"grid": {"cols": 0}},
+        {"canvas": {"height": 0}},
+        {"margin": {"left": 1000, "right": 1000}},
+        {"margin": {"gutter": -5}},
+        {"screens": [{"key": 0, "colspan": 2, "rowspan": 2, "col": 0, "row": 1}]},
+        {"screens": [{"key": 0, "colspan": 0, "rowspan": 2, "col": 1, "row": 1}]},
+    ],
+)
+def test_restore_rejects_layouts_the_model_cant_build(tmp_path, changes):
+    write_snapshot(tmp_path, **changes)
+    with pytest.raises(ValueError):
+        ss_journal.restore(tmp_path)
+
+
+def test_restore_checks_the_layout_after_replaying_the_journal(tmp_path):
+    write_snapshot(tmp_path)
+    with open(os.path.join(tmp_path, ss_journal.JOURNAL), "w") as _:
+        _.write(json.dumps({"seq": 4, "ops": [["grid", 0, 6]]}) + "\n")
+    with pytest.raises(ValueError):
+        ss_journal.restore(tmp_path)
@@ -0,0 +1,88 @@
+import math
+import re
+import pytest
+
+pytest.importorskip("pysion")
+import ss_export  # noqa: E402
+
+RESOLUTION = (1920, 1080)
+TOOL = re.compile(r"(\w+)\s*=\s*(Background|Merge|MediaIn|MediaOut|RectangleMask)\s*\{")
+SOURCE = re.compile(r'(\w+)\s*=\s*Input\s*\{\s*SourceOp\s*=\s*"(\w+)"')
+
+
+def parse_sources(text):
+    """{tool name: {input: source tool}} for every tool in text."""
+    starts = list(TOOL.finditer(text))
+    tools = {}
+    for match, after in zip(starts, starts[1:] + [None]):
+        body = text[match.end() : after.start() if after else len(text)]
+        tools[match.group(1)] = dict(SOURCE.findall(body))
+    return tools
+
+
+def layers(tools, name):
+    """The inputs under name, bottom first, and how many Merges deep it is."""
+    sources = tools.get(name, {})
+    if "Background" not in sources:
+        return [name], 0
+    below, below_depth = layers(tools, sources["Background"])
+    above, above_depth = layers(tools, sources["Foreground"])
+    return below + above, max(below_depth, above_depth) + 1
+
+
+def screens(n):
+    return [
+        {
+            "Width": 0.1,
+            "Height": 0.1,
+            "Center.X": (i + 0.5) / n,
+            "Center.Y": 0.5,
+            "Size": 0.1,
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 5, 13, 17, 33])
+def test_tree_is_balanced_and_keeps_push_order(n):
+    tree = ss_export.MergeTree()
+    merges = []
+    for i in range(n):
+        merges += tree.push(f"in{i}", 0, i)
+        # carrying like a binary counter: one pending subtree per set bit of i + 1
+        pending = [inputs for _, inputs, _, _ in tree._stack]
+        assert pending == [1 << b for b in reversed(range(i + 2)) if i + 1 >> b & 1]
+    closing, root = tree.close()
+    tools = parse_sources("".join(merges + closing))
+
+    order, depth = layers(tools, root)
+    assert order == [f"in{i}" for i in range(n)]
+    assert tree.merges == n - 1
+    assert depth == tree.depth == math.ceil(math.log2(n))
+
+
+@pytest.mark.parametrize("n", [1, 2, 3, 17])
+def test_tree_layers_screens_like_the_chain(n):
+    chain = parse_sources(ss_export.render_fusion_output(screens(n), RESOLUTION))
+    tree = parse_sources(
+        ss_export.render_fusion_output(screens(n), RESOLUTION, topology="tree")
+    )
+
+    chain_order, chain_depth = layers(chain, chain["MediaOut1"]["Input"])
+    tree_order, tree_depth = layers(tree, tree["MediaOut1"]["Input"])
+    # the chain merges every screen onto the one before, the tree masks each onto
+    # SSTransparent and stacks those, in the same order
+    media_ins = ["SSCanvas"] + [f"SSScreen{i}" for i in range(1, n + 1)]
+    assert chain_order == media_ins
+    assert [name for name in tree_order if name != "SSTransparent"] == media_ins
+    assert chain_depth == n
+    assert tree_depth <= math.ceil(math.log2(n + 1)) + 1
+
+
+def test_tree_without_exported_screens_matches_the_chain():
+    culled = [None] * 3
+    chain = ss_export.render_fusion_output(culled, RESOLUTION)
+    tree = ss_export.render_fusion_output(culled, RESOLUTION, topology="tree")
+
+    assert "SSTransparent" not in tree
+    assert tree == chain
@@ -0,0 +1,42 @@
+import gc
+import ss_classes as ss
+
+
+def test_dropped_layouts_unsubscribe_from_the_canvas():
+    canvas = ss.Canvas((1920, 1080))
+    grid = ss.Grid(canvas, ss.Margin(canvas, 20, gutter=10))
+    screen = ss.Screen(grid, 3, 2, 1, 1)
+    start = len(canvas._children)
+
+    for _ in range(10_000):
+        ss.Screen(ss.Grid(canvas, ss.Margin(canvas, 20, gutter=10)), 3, 2, 1, 1)
+    gc.collect()  # Grid <-> Screen is a reference cycle
+
+    assert len(canvas._children) == start
+    callbacks = canvas._children._callbacks.values()
+    assert all(ref() is not None for ref in callbacks)
+
+    canvas.width = 1080
+    assert canvas._children.notified == start
+    assert screen.values["Width"] > 0
+
+
+def test_deleted_screen_stops_observing_its_grid():
+    canvas = ss.Canvas((1920, 1080))
+    grid = ss.Grid(canvas, ss.Margin(canvas, 20, gutter=10))
+    screens = [ss.Screen(grid, 1, 1, col, 1) for col in range(1, 5)]
+
+    screens[0].delete()
+    assert len(grid._children) == 3
+
+
+def test_plain_function_subscribers_stay_alive():
+    canvas = ss.Canvas((1920, 1080))
+    calls = []
+    unsubscribe = canvas.give_birth(lambda: calls.append(canvas.width))
+    gc.collect()
+
+    canvas.width = 1080
+    unsubscribe()
+    canvas.width = 720
+    assert calls == [1080]
@@ -0,0 +1,50 @@
+import re
+import pytest
+import ss_classes as ss
+
+
+def build_grid():
+    canvas = ss.Canvas((1920, 1080))
+    return ss.Grid(canvas, ss.Margin(canvas, 20, gutter=10), (12, 6))
+
+
+def test_only_the_last_screen_of_a_coincident_run_isnt_a_duplicate():
+    grid = build_grid()
+    for _ in range(3):
+        ss.Screen(grid, 4, 2, 1, 1)
+    ss.Screen(grid, 4, 2, 5, 1)
+    ss.Screen(grid, 4, 2, 1, 1)
+
+    assert grid.duplicates() == [True, True, True, False, False]
+    visible, duplicates = grid.occlusion()
+    assert visible == [False, False, False, True, True]
+    assert duplicates == 3
+
+
+def test_neighbours_dont_hide_a_screen_spanning_their_gutter():
+    grid = build_grid()
+    ss.Screen(grid, 2, 1, 1, 1)
+    ss.Screen(grid, 1, 1, 1, 1)
+    ss.Screen(grid, 1, 1, 2, 1)
+
+    assert grid.occlusion() == ([True, True, True], 0)
+
+
+@pytest.mark.parametrize("cull_hidden", [False, True])
+def test_export_emits_one_node_group_per_coincident_run(tmp_path, cull_hidden):
+    pytest.importorskip("pysion")
+    import ss_batch  # noqa: E402
+
+    spec = {
+        "canvas": {"width": 1920, "height": 1080},
+        "margin": {"top": 20, "left": 20, "bottom": 20, "right": 20, "gutter": 10},
+        "grid": {"cols": 12, "rows": 6},
+        "screens": [{"colspan": 4, "rowspan": 2, "col": 1, "row": 1}] * 3
+        + [{"colspan": 4, "rowspan": 2, "col": 5, "row": 1}],
+        "cull_hidden": cull_hidden,
+    }
+    assert ss_batch.render_spec("wall", spec, str(tmp_path), "pysion") == 2
+
+    output = (tmp_path / "wall.setting").read_text()
+    merges = sorted(set(re.findall(r"SSMerge\d+", output)))
+    assert merges == ["SSMerge3", "SSMerge4"]  # the others keep their index
@@ -0,0 +1,37 @@
+import ss_classes as ss
+
+
+def build_grid():
+    canvas = ss.Canvas((1920, 1080))
+    return ss.Grid(canvas, ss.Margin(canvas, 20, gutter=10), (12, 6))
+
+
+def test_cells_of_clips_to_a_shrunk_grid():
+    grid = build_grid()
+    screen = ss.Screen(grid, 3, 3, 10, 4)
+    assert grid.occupancy.cells_of(screen) == [
+        (row - 1) * 12 + col for row in (4, 5, 6) for col in (10, 11, 12)
+    ]
+
+    grid.composition = (10, 4)
+    assert grid.occupancy.cells_of(screen) == [40]
+
+
+def test_cells_of_deleted_screen_is_empty():
+    grid = build_grid()
+    screen = ss.Screen(grid, 2, 2, 1, 1)
+    screen.delete()
+    assert grid.occupancy.cells_of(screen) == []
+
+
+def test_screen_edited_then_deleted_in_one_batch_stays_deleted():
+    grid = build_grid()
+    screen = ss.Screen(grid, 2, 2, 1, 1)
+
+    with grid.batch():
+        screen.edit(3, 3, 4, 2)
+        screen.delete()
+
+    assert screen not in grid.occupancy
+    assert grid.occupancy.is_free(1, 1, 12, 6)
+    assert grid.screens == []
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+import pytest
+
+tk = pytest.importorskip("tkinter")
+import SplitScreener  # noqa: E402
+
+
+class FakeCanvas:
+    """Just the tk.Canvas calls RectTracker makes, with idle callbacks run by hand."""
+
+    def __init__(self):
+        self.handlers = {}
+        self.idle = {}
+        self.items = {}
+        self.created = 0
+
+    def bind(self, sequence, function, add=None):
+        self.handlers[sequence] = function
+
+    def after_idle(self, function):
+        key = f"idle{len(self.idle)}"
+        self.idle[key] = function
+        return key
+
+    def after_cancel(self, key):
+        self.idle.pop(key, None)
+
+    def run_idle(self):
+        idle, self.idle = self.idle, {}
+        for function in idle.values():
+            function()
+
+    def create_rectangle(self, *coords, **options):
+        self.created += 1
+        self.items[self.created] = {"coords": list(coords), "state": tk.NORMAL}
+        return self.created
+
+    def coords(self, item, *coords):
+        self.items[item]["coords"] = list(coords)
+
+    def itemconfig(self, item, state):
+        self.items[item]["state"] = state
+
+    def tag_raise(self, item):
+        pass
+
+    def event(self, sequence, x, y):
+        self.handlers[sequence](SimpleNamespace(x=x, y=y))
+
+
+def drag(canvas, start, points):
+    canvas.event("<Button-1>", *start)
+    for point in points:
+        canvas.event("<B1-Motion>", *point)
+
+
+def test_a_burst_of_motion_redraws_once():
+    canvas = FakeCanvas()
+    tracker = SplitScreener.RectTracker(canvas)
+    tracker.autodraw(dash=(2, 2))
+
+    drag(canvas, (10, 10), [(10 + i, 20 + i) for i in range(50)])
+    assert tracker.motion_events == 50 and tracker.redraws == 0
+    canvas.run_idle()
+
+    assert tracker.redraws == 1
+    assert canvas.created == 1
+    assert canvas.items[1]["coords"] == [10, 10, 59, 69]  # the latest point
+
+
+def test_drags_reuse_one_hidden_rectangle():
+    canvas = FakeCanvas()
+    tracker = SplitScreener.RectTracker(canvas)
+    tracker.autodraw()
+
+    drag(canvas, (0, 0), [(5, 5)])
+    canvas.run_idle()
+    canvas.event("<ButtonRelease-1>", 5, 5)
+    assert canvas.items[1]["state"] == tk.HIDDEN
+
+    drag(canvas, (30, 30), [(40, 50)])
+    canvas.run_idle()
+    assert canvas.created == 1
+    assert canvas.items[1] == {"coords": [30, 30, 40, 50], "state": tk.NORMAL}
+
+
+def test_release_cancels_the_pending_redraw():
+    canvas = FakeCanvas()
+    tracker = SplitScreener.RectTracker(canvas)
+    tracker.autodraw()
+
+    drag(canvas, (0, 0), [(5, 5), (6, 6)])
+    canvas.event("<ButtonRelease-1>", 6, 6)
+    canvas.run_idle()
+
+    assert tracker.redraws == 0 and canvas.created == 0
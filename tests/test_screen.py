@@ -0,0 +1,19 @@
+import ss_classes as ss
+
+
+def build_grid():
+    canvas = ss.Canvas((1920, 1080))
+    return ss.Grid(canvas, ss.Margin(canvas, 20, gutter=10), (12, 6))
+
+
+def test_kept_values_dont_change_with_later_computes():
+    grid = build_grid()
+    screen = ss.Screen(grid, 3, 2, 1, 1)
+    kept = screen.get_values()
+    snapshot = dict(kept)
+
+    screen.edit(4, 4, 2, 2)
+    grid.margin.all = 60
+
+    assert kept == snapshot
+    assert screen.get_values() != snapshot
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_startup_probe_autosaves_to_the_override_and_closes_the_journal(tmp_path):
+    autosave = tmp_path / "autosave"
+    home = tmp_path / "home"
+    home.mkdir()
+    env = {
+        **os.environ,
+        "HOME": str(home),
+        "SS_STARTUP_PROBE": "1",
+        "SS_AUTOSAVE_DIRECTORY": str(autosave),
+    }
+    result = subprocess.run(
+        [sys.executable, "SplitScreener.py"],
+        cwd=ROOT,  # assets are loaded relatively
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    if "first paint" not in result.stdout:
+        error = (result.stderr.strip().splitlines() or ["no output"])[-1]
+        pytest.skip(f"the GUI did not start ({error})")
+
+    assert result.returncode == 0
+    assert (autosave / "snapshot.json").is_file()  # written by journal.close
+    assert not (home / ".splitscreener").exists()
@@ -0,0 +1,89 @@
+import pytest
+import ss_classes as ss
+
+
+def build_layout(resolution=(1920, 1080)):
+    canvas = ss.Canvas(resolution)
+    margin = ss.Margin(canvas, 20, gutter=10)
+    grid = ss.Grid(canvas, margin, (12, 6))
+    screen = ss.Screen(grid, 3, 2, 1, 1)
+    return canvas, margin, grid, screen
+
+
+def test_batch_matches_unbatched_edits():
+    _, margin, grid, screen = build_layout()
+    _, margin_2, grid_2, screen_2 = build_layout()
+
+    with grid.batch():
+        margin.all = 40
+        grid.composition = (8, 4)
+        screen.edit(2, 2, 3, 1)
+
+    margin_2.all = 40
+    grid_2.composition = (8, 4)
+    screen_2.edit(2, 2, 3, 1)
+    assert screen.values == screen_2.values
+
+
+def test_raising_batch_keeps_the_model_consistent():
+    _, margin, grid, screen = build_layout()
+    _, margin_2, _, screen_2 = build_layout()
+
+    with pytest.raises(RuntimeError):
+        with grid.batch():
+            margin.all = 100
+            raise RuntimeError("edit failed")
+
+    margin_2.all = 100  # what the same edit does without a batch
+    assert margin._top_px == 100
+    assert margin.top == margin_2.top
+    assert screen.values == screen_2.values
+    assert not ss.Transaction.open
+
+
+def test_batches_are_per_canvas_tree():
+    _, _, grid, _ = build_layout()
+    canvas_2, _, _, screen_2 = build_layout()
+    before = dict(screen_2.values)
+
+    with grid.batch():
+        canvas_2.width = 3840  # another tree, computes right away
+        assert screen_2.values != before
+
+
+def test_nested_batches_commit_once_at_the_outermost():
+    _, margin, grid, screen = build_layout()
+    before = dict(screen.values)
+
+    with grid.batch():
+        with grid.batch():
+            margin.all = 40
+        assert screen.values == before
+    assert screen.values != before
+
+
+def test_plain_subscribers_are_called_inside_a_batch():
+    canvas, margin, grid, _ = build_layout()
+    _, _, other_grid, _ = build_layout()
+    calls = []
+    canvas.give_birth(lambda: calls.append(canvas.width))
+
+    with other_grid.batch():  # a batch on another tree doesn't matter either
+        with grid.batch():
+            canvas.width = 3840
+            assert calls == [3840]
+    assert margin.left == 20 / 3840
+
+
+def test_model_objects_without_depth_fail_in_a_batch():
+    canvas, _, grid, _ = build_layout()
+
+    class Widget:
+        root = canvas
+
+        def compute(self):
+            pass
+
+    with grid.batch():
+        with pytest.raises(TypeError):
+            ss.schedule(Widget().compute)